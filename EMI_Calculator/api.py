@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""Headless JSON API for the EMI engine
+
+A small standard-library HTTP server over the same numeric core as the
+Gradio app, for services that just need numbers (no websocket/queue).
+Start it with `python cli.py serve` (or `python api.py`).
+
+    GET  /health      -> {"ok": true}
+    GET  /stats       -> result cache and exchange-rate status
+    POST /emi         {"principal": 500000, "annual_interest_rate": 8.5, "tenure_years": 10,
+                       "input_currency": "USD", "output_currency": "INR", "schedule": false}
+    POST /batch       {"principal": [...], "annual_interest_rate": [...], "tenure_years": [...]}
+    POST /scenarios   {"principal": ..., "annual_interest_rate": ..., "tenure_years": ...,
+                       "scenarios": [...]}   (see scenarios.py for the scenario format)
+    POST /stream      NDJSON in, NDJSON out: one loan object per line
+
+Currencies can be ISO codes or the app's display names; both default to USD.
+"""
+
+import json
+import math
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from emi_core import price_loans
+from emi_cache import loan_breakdown, cache_stats
+from currency import get_rate_matrix, resolve_currency, BASE_CURRENCY
+from scenarios import compare_scenarios
+from rate_providers import rate_cache
+
+API_HOST = os.getenv("EMI_API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("EMI_API_PORT", "8000"))
+MAX_BODY_BYTES = 64 * 1024 * 1024
+STREAM_CHUNK = 10_000  # NDJSON lines priced per vectorized call
+MAX_LINE_BYTES = 1024 * 1024  # longer NDJSON lines (newline included) are rejected
+
+
+def _clean(value):
+    """Makes NumPy values JSON-safe (NaN/inf -> null)."""
+    if isinstance(value, np.ndarray):
+        return [_clean(v) for v in value.tolist()]
+    if isinstance(value, (list, tuple)):
+        return [_clean(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _clean(v) for k, v in value.items()}
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        return value if math.isfinite(value) else None
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+def _currencies(data):
+    return (resolve_currency(data.get("input_currency") or BASE_CURRENCY),
+            resolve_currency(data.get("output_currency") or data.get("input_currency") or BASE_CURRENCY))
+
+
+# --- Handlers (plain functions, shared with cli.py) ---
+def price_one(data):
+    """Single loan -> EMI, totals and (optionally) the month-by-month schedule."""
+    principal = float(data["principal"])
+    rate = float(data["annual_interest_rate"])
+    years = float(data["tenure_years"])
+    if principal <= 0 or rate < 0 or years <= 0:
+        raise ValueError("principal and tenure_years must be positive and annual_interest_rate non-negative")
+    input_currency, output_currency = _currencies(data)
+    result = loan_breakdown(principal, rate, years, input_currency, output_currency)
+    response = {
+        "emi": result.emi,
+        "total_interest": result.total_interest,
+        "total_payable": result.total_payable,
+        "currency": output_currency,
+    }
+    if data.get("schedule"):
+        response["schedule"] = result.schedule
+    return _clean(response)
+
+
+def price_batch(data):
+    """Arrays of loans -> arrays of results (invalid loans give null)."""
+    input_currency, output_currency = _currencies(data)
+    factor = get_rate_matrix().factor(input_currency, output_currency)
+    kwargs = {"tenure_months": data["tenure_months"]} if "tenure_months" in data else {"tenure_years": data["tenure_years"]}
+    results = price_loans(data["principal"], data["annual_interest_rate"], **kwargs)
+    response = {key: values * factor for key, values in results.items()}
+    response["currency"] = output_currency
+    return _clean(response)
+
+
+def price_scenarios(data):
+    input_currency, output_currency = _currencies(data)
+    factor = get_rate_matrix().factor(input_currency, output_currency)
+    scenarios = [dict(s, recurring=[tuple(r) + (None,) * (4 - len(r)) for r in s.get("recurring", ())])
+                 for s in data.get("scenarios", ())]
+    result = compare_scenarios(float(data["principal"]), float(data["annual_interest_rate"]),
+                               float(data["tenure_years"]), scenarios)
+    money = {"first_emi", "last_emi", "total_interest", "total_prepaid", "total_paid", "interest_saved"}
+    summary = {key: values * factor if key in money else values for key, values in result["summary"].items()}
+    return _clean({"names": result["names"], "summary": summary, "currency": output_currency})
+
+
+def price_ndjson(lines, chunk_size=STREAM_CHUNK):
+    """
+    Prices an iterable of NDJSON lines and yields one NDJSON result line per
+    non-blank input line, in order. Lines (str or UTF-8 bytes) are priced in vectorized
+    chunks; a bad line (invalid JSON or UTF-8, missing fields, longer than
+    MAX_LINE_BYTES) yields {"error": ...} instead of stopping the stream.
+    """
+    chunk = []
+    for line in lines:
+        if line.strip():
+            chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield from _price_chunk(chunk)
+            chunk = []
+    if chunk:
+        yield from _price_chunk(chunk)
+
+
+def _price_chunk(lines):
+    rates = get_rate_matrix()  # one snapshot per chunk
+    records, errors = [], {}
+    for i, line in enumerate(lines):
+        try:
+            if len(line) > MAX_LINE_BYTES:
+                raise ValueError(f"line longer than {MAX_LINE_BYTES} bytes")
+            if isinstance(line, bytes):
+                line = line.decode("utf-8")  # UnicodeDecodeError is a ValueError
+            data = json.loads(line)
+            records.append((i, float(data["principal"]), float(data["annual_interest_rate"]),
+                            float(data["tenure_years"]) * 12, rates.factor(*_currencies(data)), data.get("id")))
+        except (ValueError, KeyError, TypeError) as e:
+            errors[i] = {"error": f"{type(e).__name__}: {e}"}
+
+    results = {}
+    if records:
+        priced = price_loans(np.array([r[1] for r in records]), np.array([r[2] for r in records]),
+                             tenure_months=np.array([r[3] for r in records]))
+        factor = np.array([r[4] for r in records])
+        converted = {key: values * factor for key, values in priced.items()}
+        for j, record in enumerate(records):
+            row = {key: values[j] for key, values in converted.items()}
+            if record[5] is not None:
+                row = {"id": record[5], **row}
+            results[record[0]] = _clean(row)
+
+    for i in range(len(lines)):
+        yield json.dumps(results.get(i) or errors[i], ensure_ascii=False) + "\n"
+
+
+# --- HTTP server ---
+ROUTES = {"/emi": price_one, "/batch": price_batch, "/scenarios": price_scenarios}
+
+
+class EMIRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body_length(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("request body too large")
+        return length
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"ok": True})
+        elif self.path == "/stats":
+            self._send_json(200, {"cache": cache_stats(), "rates": rate_cache.stats()})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        try:
+            length = self._body_length()
+        except ValueError as e:
+            self.close_connection = True  # the unread body can't be skipped safely
+            self._send_json(413, {"error": str(e)})
+            return
+
+        if self.path == "/stream":
+            self._stream(length)
+            return
+
+        handler = ROUTES.get(self.path)
+        if handler is None:
+            self.rfile.read(length)
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            data = json.loads(self.rfile.read(length) or b"{}")
+            self._send_json(200, handler(data))
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": f"{type(e).__name__}: {e}"})
+
+    def _stream(self, length):
+        """NDJSON in, NDJSON out, written with chunked encoding as each chunk is priced."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def request_lines():
+            remaining = length
+            while remaining > 0:
+                line = self.rfile.readline(min(remaining, MAX_LINE_BYTES + 1))
+                if not line:
+                    break
+                remaining -= len(line)
+                if len(line) > MAX_LINE_BYTES and not line.endswith(b"\n"):
+                    # Over-long line: skip the rest of it so it becomes one error row, not several
+                    while remaining > 0:
+                        tail = self.rfile.readline(min(remaining, 64 * 1024))
+                        if not tail:
+                            break
+                        remaining -= len(tail)
+                        if tail.endswith(b"\n"):
+                            break
+                yield line
+
+        batch = []
+        for out_line in price_ndjson(request_lines()):
+            batch.append(out_line)
+            if len(batch) >= 1000:
+                self._write_chunk("".join(batch).encode("utf-8"))
+                batch = []
+        if batch:
+            self._write_chunk("".join(batch).encode("utf-8"))
+        self._write_chunk(b"")  # terminating zero-length chunk
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+
+    def log_message(self, format, *args):
+        pass  # keep the console quiet; errors are returned to the caller
+
+
+def serve(host=API_HOST, port=API_PORT):
+    rate_cache.start()
+    server = ThreadingHTTPServer((host, port), EMIRequestHandler)
+    print(f"📈 EMI API listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    serve()
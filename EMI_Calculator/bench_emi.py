@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for the EMI computation and rendering path
+
+    python bench_emi.py                          # writes bench_results.json
+    python bench_emi.py --quick -o before.json   # fewer tenures / batch sizes
+    python bench_emi.py -o after.json --compare before.json
+    python bench_emi.py --check-imports          # fail if the numeric core imports gradio/pandas/matplotlib
+    python bench_emi.py --check-imports --import-budget-ms 500   # ...or is slower than that to import
+
+Each stage of calculate_emi is timed on its own, across loan tenures, plus
+batch pricing across batch sizes, calculate_emi end to end (when gradio
+is installed) and the cold import time of each module (in a fresh
+interpreter, noting which heavy libraries it drags in). The
+pre-optimization loop is kept here as `legacy_*` so its numbers can be
+compared with the current code on the same machine. Results are saved as
+JSON for regression comparison.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+import numpy as np
+
+from emi_core import monthly_emi, amortization_schedule, price_loans
+from currency import get_rate_matrix, exchange_rates
+import emi_cache
+
+TENURES = list(range(1, 31))
+QUICK_TENURES = [1, 5, 10, 20, 30]
+BATCH_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+QUICK_BATCH_SIZES = [1_000, 100_000]
+
+PRINCIPAL = 500_000
+RATE = 8.5
+FROM_CURRENCY = "United States Dollar ($)"
+TO_CURRENCY = "Indian Rupee (₹)"
+
+HEAVY_MODULES = ["gradio", "pandas", "matplotlib"]
+# Modules that must stay importable without the heavy libraries (cli.py, api.py, batch jobs)
+NUMERIC_CORE = ["emi_core", "currency", "emi_cache", "rate_providers", "scenarios", "charts", "api"]
+IMPORT_MODULES = NUMERIC_CORE + ["app"]
+
+
+# --- Legacy reference (the per-month loop calculate_emi used to run) ---
+def legacy_convert(amount, from_currency_display, to_currency_display):
+    if from_currency_display == to_currency_display:
+        return amount
+    return amount / exchange_rates[from_currency_display] * exchange_rates[to_currency_display]
+
+
+def legacy_schedule(principal, annual_interest_rate, tenure_months, from_currency_display, to_currency_display, symbol="₹"):
+    r = annual_interest_rate / (12 * 100)
+    emi = principal * r * ((1 + r) ** tenure_months) / (((1 + r) ** tenure_months) - 1)
+    emi_converted = legacy_convert(emi, from_currency_display, to_currency_display)
+    balance = principal
+    rows = []
+    for month in range(1, tenure_months + 1):
+        interest_payment = balance * r
+        principal_payment = emi - interest_payment
+        ending_balance = balance - principal_payment
+        bal = legacy_convert(balance, from_currency_display, to_currency_display)
+        prin = legacy_convert(principal_payment, from_currency_display, to_currency_display)
+        intr = legacy_convert(interest_payment, from_currency_display, to_currency_display)
+        end_bal = legacy_convert(ending_balance, from_currency_display, to_currency_display)
+        rows.append([month, f"{symbol} {bal:,.2f}", f"{symbol} {emi_converted:,.2f}", f"{symbol} {prin:,.2f}",
+                     f"{symbol} {intr:,.2f}", f"{symbol} {end_bal:,.2f}"])
+        balance = ending_balance
+    return rows
+
+
+# --- Timing ---
+def measure(fn, repeat=5, min_time=0.05):
+    """Median / min milliseconds per call, with the loop count picked so each sample runs >= min_time."""
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time or number >= 1_000_000:
+            break
+        number *= 4
+    samples = [t / number * 1000 for t in timer.repeat(repeat=repeat, number=number)]
+    return {"median_ms": statistics.median(samples), "min_ms": min(samples), "loops": number, "repeat": repeat}
+
+
+def run_benchmarks(tenures, batch_sizes, repeat):
+    results = []
+
+    def record(name, fn, **params):
+        row = {"name": name, **params, **measure(fn, repeat=repeat)}
+        results.append(row)
+        extra = " ".join(f"{k}={v}" for k, v in params.items())
+        print(f"  {name:<28} {extra:<22} {_format_ms(row['median_ms'])}")
+
+    rates = get_rate_matrix()
+    factor = rates.factor(FROM_CURRENCY, TO_CURRENCY)
+
+    try:
+        import pandas as pd
+    except ImportError:
+        pd = None
+    try:
+        from charts import chart_data, render_chart_png
+    except ImportError:
+        chart_data = render_chart_png = None
+    try:
+        import matplotlib  # noqa: F401  (render_chart_png needs it)
+        have_matplotlib = True
+    except ImportError:
+        have_matplotlib = False
+
+    print("Per-stage, per tenure:")
+    for years in tenures:
+        months = years * 12
+        record("emi_formula", lambda: monthly_emi(PRINCIPAL, RATE, months), tenure_years=years)
+        record("schedule_closed_form", lambda: amortization_schedule(PRINCIPAL, RATE, months), tenure_years=years)
+        schedule = amortization_schedule(PRINCIPAL, RATE, months)
+        record("currency_conversion", lambda: {k: v * factor for k, v in schedule.items() if k != "month"},
+               tenure_years=years)
+        record("legacy_schedule_loop", lambda: legacy_schedule(PRINCIPAL, RATE, months, FROM_CURRENCY, TO_CURRENCY),
+               tenure_years=years)
+
+        def uncached():
+            emi_cache.clear_cache()
+            return emi_cache.loan_breakdown(PRINCIPAL, RATE, years, FROM_CURRENCY, TO_CURRENCY, rates)
+        record("loan_breakdown_uncached", uncached, tenure_years=years)
+        record("loan_breakdown_cached",
+               lambda: emi_cache.loan_breakdown(PRINCIPAL, RATE, years, FROM_CURRENCY, TO_CURRENCY, rates),
+               tenure_years=years)
+
+        if pd is not None:
+            converted = emi_cache.loan_breakdown(PRINCIPAL, RATE, years, FROM_CURRENCY, TO_CURRENCY, rates).schedule
+
+            def build_frame():
+                return pd.DataFrame({
+                    "Month": converted["month"].astype(int),
+                    "Beginning Balance": converted["beginning_balance"],
+                    "EMI": converted["emi"],
+                    "Principal Paid": converted["principal_paid"],
+                    "Interest Paid": converted["interest_paid"],
+                    "Outstanding Balance": converted["ending_balance"],
+                })
+            record("dataframe_numeric", build_frame, tenure_years=years)
+            frame = build_frame()
+            money_columns = [c for c in frame.columns if c != "Month"]
+            # Gradio turns a Styler into display values via _translate (not to_html), so time that step
+            record("dataframe_styler_display",
+                   lambda: frame.style.format("₹ {:,.2f}", subset=money_columns).hide(axis="index")._translate(True, True),
+                   tenure_years=years)
+            legacy_rows = legacy_schedule(PRINCIPAL, RATE, months, FROM_CURRENCY, TO_CURRENCY)
+            record("legacy_dataframe_strings", lambda: pd.DataFrame(legacy_rows), tenure_years=years)
+            if chart_data is not None:
+                record("chart_data_lineplot", lambda: chart_data(converted), tenure_years=years)
+                if have_matplotlib:
+                    record("chart_png_agg", lambda: render_chart_png(converted, "₹"), tenure_years=years)
+
+    print("Batch pricing:")
+    rng = np.random.default_rng(0)
+    for size in batch_sizes:
+        principal = rng.uniform(1_000, 10_000_000, size)
+        rate = rng.uniform(0, 20, size)
+        years = rng.integers(1, 31, size)
+        record("batch_price_loans", lambda: price_loans(principal, rate, tenure_years=years), batch_size=size)
+
+    if importlib.util.find_spec("gradio") is None:
+        print("Skipping calculate_emi end to end: gradio is not installed")
+    else:
+        import app
+        print("calculate_emi end to end:")
+        for years in tenures:
+            def cold():
+                emi_cache.clear_cache()
+                return app.calculate_emi(PRINCIPAL, RATE, years, FROM_CURRENCY, TO_CURRENCY)
+            record("calculate_emi_cold", cold, tenure_years=years)
+            record("calculate_emi_warm", lambda: app.calculate_emi(PRINCIPAL, RATE, years, FROM_CURRENCY, TO_CURRENCY),
+                   tenure_years=years)
+
+    print("Cold import (fresh interpreter):")
+    for module in IMPORT_MODULES:
+        row = measure_import(module, repeat=repeat)
+        results.append(row)
+        if row.get("error"):
+            print(f"  import {module:<21} failed: {row['error']}")
+            continue
+        heavy = ", ".join(row["heavy_modules"]) or "-"
+        print(f"  import {module:<21} {'heavy: ' + heavy:<22} {_format_ms(row['median_ms'])}")
+    return results
+
+
+def _format_ms(value):
+    return f"{value:10.4f} ms" if value is not None else f"{'n/a':>10}"
+
+
+# --- Import time ---
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module, repeat=5):
+    """Times `import module` in a new interpreter each sample, so nothing is already cached in sys.modules."""
+    code = _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)
+    samples, heavy = [], []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=120,
+                              cwd=os.path.dirname(os.path.abspath(__file__)))
+        if proc.returncode != 0:
+            return {"name": f"import_{module}", "median_ms": None, "min_ms": None, "heavy_modules": [],
+                    "error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+        probe = json.loads(proc.stdout.strip().splitlines()[-1])
+        samples.append(probe["ms"])
+        heavy = probe["heavy"]
+    return {"name": f"import_{module}", "median_ms": statistics.median(samples), "min_ms": min(samples),
+            "heavy_modules": heavy, "repeat": repeat}
+
+
+def check_imports(budget_ms=None, repeat=3):
+    """
+    Returns (module, problem) for each NUMERIC_CORE module that fails to import,
+    pulls in a heavy library, or (with budget_ms) takes longer than the budget to import.
+    """
+    failures = []
+    for module in NUMERIC_CORE:
+        row = measure_import(module, repeat=repeat if budget_ms else 1)
+        if row.get("error"):
+            failures.append((module, row["error"]))
+        elif row["heavy_modules"]:
+            failures.append((module, "imports " + ", ".join(row["heavy_modules"])))
+        elif budget_ms and row["median_ms"] > budget_ms:
+            failures.append((module, f"{row['median_ms']:.1f} ms > budget {budget_ms:g} ms"))
+    return failures
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "commit": commit,
+    }
+
+
+def _key(row):
+    return (row["name"], row.get("tenure_years"), row.get("batch_size"))
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {_key(r): r for r in json.load(f)["results"]}
+    print(f"\nCompared with {baseline_path} (ratio > 1 = faster now):")
+    for row in results:
+        old = baseline.get(_key(row))
+        if old:
+            if old["median_ms"] is None or row["median_ms"] is None:
+                continue
+            ratio = old["median_ms"] / row["median_ms"] if row["median_ms"] else float("inf")
+            flag = "  ⚠️ slower" if ratio < 0.9 else ""
+            params = row.get("tenure_years") or row.get("batch_size")
+            print(f"  {row['name']:<28} {params!s:<8} {old['median_ms']:10.4f} -> {row['median_ms']:10.4f} ms  x{ratio:.2f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EMI computation and rendering benchmarks")
+    parser.add_argument("-o", "--output", default="bench_results.json", help="Where to write the JSON results")
+    parser.add_argument("--quick", action="store_true", help="Fewer tenures and batch sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per benchmark (median is reported)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Earlier results JSON to compare against")
+    parser.add_argument("--check-imports", action="store_true",
+                        help="Only check that the numeric core imports without gradio/pandas/matplotlib")
+    parser.add_argument("--import-budget-ms", type=float, metavar="MS",
+                        help="With --check-imports, also fail if a core module takes longer than MS to import")
+    args = parser.parse_args(argv)
+
+    if args.check_imports:
+        failures = check_imports(args.import_budget_ms)
+        for module, problem in failures:
+            print(f"❌ import {module}: {problem}")
+        if failures:
+            sys.exit(1)
+        budget = f" within {args.import_budget_ms:g} ms" if args.import_budget_ms else ""
+        print(f"✅ {len(NUMERIC_CORE)} core modules import{budget} without {', '.join(HEAVY_MODULES)}")
+        return
+
+    results = run_benchmarks(QUICK_TENURES if args.quick else TENURES,
+                             QUICK_BATCH_SIZES if args.quick else BATCH_SIZES, args.repeat)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"Saved {len(results)} results to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
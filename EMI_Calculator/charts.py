@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""EMI breakdown chart
+
+The app sends the chart as data to Gradio's LinePlot and the browser draws it,
+so no figure is rendered on the server per click. render_chart_png() is for
+places that need a static image; it uses matplotlib's object-oriented Agg API
+(no pyplot global state, safe across worker threads) and frees the figure
+when done.
+"""
+
+import io
+
+import numpy as np
+
+CHART_MAX_POINTS = 120  # per series; a 30-year loan has 360 months
+
+# (label, schedule key, colour) for each line
+CHART_SERIES = [
+    ("Principal Paid", "principal_paid", "#6a5acd"),
+    ("Interest Paid", "interest_paid", "#db7093"),
+    ("Monthly EMI", "emi", "orange"),
+]
+CHART_COLORS = {label: color for label, _, color in CHART_SERIES}
+
+
+def downsample_index(length, max_points=CHART_MAX_POINTS):
+    """Evenly spaced indices into a series of `length` points, always keeping the first and last."""
+    if length <= max_points:
+        return np.arange(length)
+    return np.unique(np.linspace(0, length - 1, max_points).round().astype(np.intp))
+
+
+def chart_data(schedule, max_points=CHART_MAX_POINTS):
+    """Long-format (Month, Amount, Series) data for gr.LinePlot from an amortization schedule."""
+    import pandas as pd  # deferred until a chart is actually built
+    idx = downsample_index(len(schedule["month"]), max_points)
+    months = schedule["month"][idx].astype(int)
+    return pd.DataFrame({
+        "Month": np.tile(months, len(CHART_SERIES)),
+        "Amount": np.concatenate([schedule[key][idx] for _, key, _ in CHART_SERIES]),
+        "Series": np.repeat([label for label, _, _ in CHART_SERIES], len(idx)),
+    })
+
+
+def render_chart_png(schedule, output_symbol, max_points=CHART_MAX_POINTS, dpi=100):
+    """Renders the breakdown chart to PNG bytes."""
+    from matplotlib.figure import Figure  # only needed for static images
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    idx = downsample_index(len(schedule["month"]), max_points)
+    months = schedule["month"][idx]
+
+    fig = Figure(figsize=(10, 4), dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    try:
+        ax = fig.add_subplot()
+        for label, key, color in CHART_SERIES:
+            ax.plot(months, schedule[key][idx], label=label, color=color,
+                    linestyle="--" if key == "emi" else "-")
+        ax.set_xlabel("Month")
+        ax.set_ylabel(f"Amount ({output_symbol})")
+        ax.set_title("EMI Breakdown Over Time")
+        ax.legend()
+        fig.tight_layout()
+
+        buffer = io.BytesIO()
+        canvas.print_png(buffer)
+        return buffer.getvalue()
+    finally:
+        fig.clear()  # drop the artists now instead of waiting for the garbage collector
+
+
+def scenario_chart_data(names, balances, max_points=CHART_MAX_POINTS):
+    """Long-format (Month, Balance, Scenario) data for gr.LinePlot from a (scenarios x months) balance grid."""
+    import pandas as pd
+    idx = downsample_index(balances.shape[1], max_points)
+    return pd.DataFrame({
+        "Month": np.tile(idx + 1, len(names)),
+        "Balance": balances[:, idx].ravel(),
+        "Scenario": np.repeat(names, len(idx)),
+    })
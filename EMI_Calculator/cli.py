@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Command-line entry point for the EMI engine (no Gradio needed)
+
+    python cli.py emi 500000 8.5 10 --from USD --to INR [--schedule]
+    python cli.py batch loans.csv [-o priced.csv]      # CSV/Parquet in, CSV/Parquet/JSON out
+    python cli.py stream < loans.ndjson > priced.ndjson
+    python cli.py serve [--host 127.0.0.1] [--port 8000]
+"""
+
+import argparse
+import json
+import sys
+
+from api import price_one, price_ndjson, serve, API_HOST, API_PORT
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ctrl+Loan EMI engine")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    emi_parser = subparsers.add_parser("emi", help="Price a single loan and print JSON")
+    emi_parser.add_argument("principal", type=float)
+    emi_parser.add_argument("annual_interest_rate", type=float, help="Annual interest rate in %%")
+    emi_parser.add_argument("tenure_years", type=float)
+    emi_parser.add_argument("--from", dest="input_currency", default="USD", help="Input currency (ISO code)")
+    emi_parser.add_argument("--to", dest="output_currency", default=None, help="Output currency (default: same as input)")
+    emi_parser.add_argument("--schedule", action="store_true", help="Include the month-by-month schedule")
+
+    batch_parser = subparsers.add_parser("batch", help="Price every loan in a CSV/Parquet file")
+    batch_parser.add_argument("path", help="File with principal, annual_interest_rate and tenure_years columns")
+    batch_parser.add_argument("-o", "--output", help="Output .csv, .parquet or .json (default: CSV to stdout)")
+
+    subparsers.add_parser("stream", help="Price NDJSON loans from stdin and write NDJSON results to stdout")
+
+    serve_parser = subparsers.add_parser("serve", help="Run the JSON HTTP API")
+    serve_parser.add_argument("--host", default=API_HOST)
+    serve_parser.add_argument("--port", type=int, default=API_PORT)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "emi":
+        try:
+            result = price_one(vars(args))
+        except ValueError as e:
+            parser.exit(1, f"Error: {e}\n")
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    elif args.command == "batch":
+        from emi_core import price_loan_file
+        df = price_loan_file(args.path)
+        output = args.output or ""
+        if output.lower().endswith((".parquet", ".pq")):
+            df.to_parquet(output, index=False)
+        elif output.lower().endswith(".json"):
+            df.to_json(output, orient="records", lines=True)
+        else:
+            df.to_csv(output or sys.stdout, index=False)
+        if output:
+            print(f"✨ Priced {len(df):,} loans -> {output}", file=sys.stderr)
+
+    elif args.command == "stream":
+        for line in price_ndjson(sys.stdin):
+            sys.stdout.write(line)
+
+    elif args.command == "serve":
+        serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
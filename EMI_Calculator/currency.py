@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""Currency tables and conversion
+
+Conversion goes through a dense rate matrix precomputed from exchange_rates,
+so converting a whole array (an amortization schedule, a loan book) is a
+single multiply instead of one dict lookup per value.
+"""
+
+import threading
+
+import numpy as np
+
+# Define a dictionary of common currencies and their symbols
+currency_symbols = {
+    "United States Dollar ($)": "$",
+    "Euro (€)": "€",
+    "British Pound (£)": "£",
+    "Japanese Yen (¥)": "¥",
+    "Indian Rupee (₹)": "₹",
+    "Canadian Dollar (C$)": "C$",
+    "Australian Dollar (A$)": "A$",
+    "Swiss Franc (CHF)": "CHF",
+    "Chinese Yuan (¥)": "¥", # Note: Yuan uses same symbol as Yen
+    "Singapore Dollar (S$)": "S$",
+    "Hong Kong Dollar (HK$)": "HK$",
+    "New Zealand Dollar (NZ$)": "NZ$",
+    "South Korean Won (₩)": "₩",
+    "Swedish Krona (kr)": "kr",
+    "Norwegian Krone (kr)": "kr",
+    "Danish Krone (kr)": "kr",
+    "Mexican Peso (Mex$)": "Mex$",
+    "Brazilian Real (R$)": "R$",
+    "Russian Ruble (₽)": "₽",
+    "South African Rand (R)": "R",
+    "United Arab Emirates Dirham (د.إ)": "د.إ",
+    "Saudi Riyal (﷼)": "﷼",
+    "Turkish Lira (₺)": "₺",
+    "Argentine Peso ($)": "$", # Note: Some pesos use $
+    "Egyptian Pound (E£)": "E£",
+    "Philippine Peso (₱)": "₱",
+    "Thai Baht (฿)": "฿",
+    "Malaysian Ringgit (RM)": "RM",
+    "Indonesian Rupiah (Rp)": "Rp",
+    "Vietnamese Dong (₫)": "₫",
+    "Pakistani Rupee (₨)": "₨",
+    "Bangladeshi Taka (৳)": "৳",
+    "Sri Lankan Rupee (Rs)": "Rs",
+    "Nigerian Naira (₦)": "₦",
+    "Kenyan Shilling (KSh)": "KSh",
+    "Ghanaian Cedi (₵)": "₵",
+    "Chilean Peso (CLP$)": "CLP$",
+    "Colombian Peso (COL$)": "COL$",
+    "Peruvian Sol (S/.)": "S/.",
+    "Czech Koruna (Kč)": "Kč",
+    "Polish Złoty (zł)": "zł",
+    "Hungarian Forint (Ft)": "Ft",
+    "Romanian Leu (lei)": "lei",
+}
+
+# ISO 4217 codes, used by the rate providers (see rate_providers.py)
+currency_codes = {
+    "United States Dollar ($)": "USD",
+    "Euro (€)": "EUR",
+    "British Pound (£)": "GBP",
+    "Japanese Yen (¥)": "JPY",
+    "Indian Rupee (₹)": "INR",
+    "Canadian Dollar (C$)": "CAD",
+    "Australian Dollar (A$)": "AUD",
+    "Swiss Franc (CHF)": "CHF",
+    "Chinese Yuan (¥)": "CNY",
+    "Singapore Dollar (S$)": "SGD",
+    "Hong Kong Dollar (HK$)": "HKD",
+    "New Zealand Dollar (NZ$)": "NZD",
+    "South Korean Won (₩)": "KRW",
+    "Swedish Krona (kr)": "SEK",
+    "Norwegian Krone (kr)": "NOK",
+    "Danish Krone (kr)": "DKK",
+    "Mexican Peso (Mex$)": "MXN",
+    "Brazilian Real (R$)": "BRL",
+    "Russian Ruble (₽)": "RUB",
+    "South African Rand (R)": "ZAR",
+    "United Arab Emirates Dirham (د.إ)": "AED",
+    "Saudi Riyal (﷼)": "SAR",
+    "Turkish Lira (₺)": "TRY",
+    "Argentine Peso ($)": "ARS",
+    "Egyptian Pound (E£)": "EGP",
+    "Philippine Peso (₱)": "PHP",
+    "Thai Baht (฿)": "THB",
+    "Malaysian Ringgit (RM)": "MYR",
+    "Indonesian Rupiah (Rp)": "IDR",
+    "Vietnamese Dong (₫)": "VND",
+    "Pakistani Rupee (₨)": "PKR",
+    "Bangladeshi Taka (৳)": "BDT",
+    "Sri Lankan Rupee (Rs)": "LKR",
+    "Nigerian Naira (₦)": "NGN",
+    "Kenyan Shilling (KSh)": "KES",
+    "Ghanaian Cedi (₵)": "GHS",
+    "Chilean Peso (CLP$)": "CLP",
+    "Colombian Peso (COL$)": "COP",
+    "Peruvian Sol (S/.)": "PEN",
+    "Czech Koruna (Kč)": "CZK",
+    "Polish Złoty (zł)": "PLN",
+    "Hungarian Forint (Ft)": "HUF",
+    "Romanian Leu (lei)": "RON",
+}
+
+# --- IMPORTANT: Placeholder for real-time exchange rates ---
+# In a real application, you would fetch these from a reliable API.
+# These are sample rates relative to USD as the base currency.
+# 1 USD = X of the listed currency.
+exchange_rates = {
+    "United States Dollar ($)": 1.0,
+    "Euro (€)": 0.85,
+    "British Pound (£)": 0.73,
+    "Japanese Yen (¥)": 144.51,
+    "Indian Rupee (₹)": 85.50,
+    "Canadian Dollar (C$)": 1.36,
+    "Australian Dollar (A$)": 1.53,
+    "Swiss Franc (CHF)": 0.79,
+    "Chinese Yuan (¥)": 7.17,
+    "Singapore Dollar (S$)": 1.27,
+    "Hong Kong Dollar (HK$)": 7.85,
+    "New Zealand Dollar (NZ$)": 1.65,
+    "South Korean Won (₩)": 1362.33,
+    "Swedish Krona (kr)": 9.56,
+    "Norwegian Krone (kr)": 10.09,
+    "Danish Krone (kr)": 6.33,
+    "Mexican Peso (Mex$)": 18.63,
+    "Brazilian Real (R$)": 5.42,
+    "Russian Ruble (₽)": 78.61,
+    "South African Rand (R)": 17.61,
+    "United Arab Emirates Dirham (د.إ)": 3.67,
+    "Saudi Riyal (﷼)": 3.75,
+    "Turkish Lira (₺)": 39.87,
+    "Argentine Peso ($)": 900.00,
+    "Egyptian Pound (E£)": 49.26,
+    "Philippine Peso (₱)": 56.51,
+    "Thai Baht (฿)": 32.39,
+    "Malaysian Ringgit (RM)": 4.22,
+    "Indonesian Rupiah (Rp)": 16129.03,
+    "Vietnamese Dong (₫)": 26180.00,
+    "Pakistani Rupee (₨)": 283.78,
+    "Bangladeshi Taka (৳)": 121.95,
+    "Sri Lankan Rupee (Rs)": 299.94,
+    "Nigerian Naira (₦)": 1529.68,
+    "Kenyan Shilling (KSh)": 129.15,
+    "Ghanaian Cedi (₵)": 10.35,
+    "Chilean Peso (CLP$)": 929.99,
+    "Colombian Peso (COL$)": 4100.00,
+    "Peruvian Sol (S/.)": 3.54,
+    "Czech Koruna (Kč)": 20.92,
+    "Polish Złoty (zł)": 3.60,
+    "Hungarian Forint (Ft)": 338.90,
+    "Romanian Leu (lei)": 4.29,
+}
+
+BASE_CURRENCY = "United States Dollar ($)"
+RATES_AS_OF = "2025-07-05"  # date of the built-in rates above
+
+def resolve_currency(value):
+    """Accepts a display name ("Indian Rupee (₹)") or an ISO code ("INR") and returns the display name."""
+    if value in currency_symbols:
+        return value
+    for name, code in currency_codes.items():
+        if code == str(value).upper():
+            return name
+    raise ValueError(f"Unknown currency: {value}")
+
+
+class RateMatrix:
+    """
+    Immutable snapshot of exchange_rates as a matrix: factors[i, j] converts an
+    amount in currency i into currency j. Currencies are indexed by `ids`.
+    """
+
+    def __init__(self, rates, version=0, as_of=RATES_AS_OF):
+        self.names = list(rates.keys())
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        per_usd = np.array([rates[name] for name in self.names], dtype=np.float64)
+        # amount / from_rate * to_rate, precomputed for every pair
+        self.factors = per_usd[np.newaxis, :] / per_usd[:, np.newaxis]
+        self.factors.flags.writeable = False
+        self.version = version
+        self.as_of = as_of
+
+    def factor(self, from_currency_display, to_currency_display):
+        from_id = self.ids.get(from_currency_display)
+        to_id = self.ids.get(to_currency_display)
+        if from_id is None or to_id is None:
+            raise ValueError(f"Exchange rate not found for {from_currency_display} or {to_currency_display}")
+        return self.factors[from_id, to_id]
+
+    def convert(self, amounts, from_currency_display, to_currency_display):
+        """Converts a scalar or an array of amounts in one operation."""
+        if from_currency_display == to_currency_display:
+            return amounts
+        return np.multiply(amounts, self.factor(from_currency_display, to_currency_display))
+
+
+_matrix = RateMatrix(exchange_rates)
+_update_lock = threading.Lock()
+
+
+def get_rate_matrix():
+    """The current snapshot. Hold on to it for a whole calculation so every value uses the same rates."""
+    return _matrix
+
+
+def set_exchange_rates(rates, as_of=None):
+    """
+    Replaces the rate table. The new matrix is built first and then swapped in
+    with a single assignment, so concurrent readers see either the old or the
+    new rates, never a mix.
+    """
+    global _matrix, exchange_rates
+    with _update_lock:
+        new_matrix = RateMatrix(rates, version=_matrix.version + 1, as_of=as_of or _matrix.as_of)
+        exchange_rates = dict(rates)
+        _matrix = new_matrix
+    return new_matrix
+
+
+def convert_currency(amount, from_currency_display, to_currency_display):
+    """
+    Converts an amount (or a NumPy array of amounts) from one currency to another
+    using the current exchange rates.
+    """
+    return _matrix.convert(amount, from_currency_display, to_currency_display)
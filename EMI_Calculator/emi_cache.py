@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Memoized loan results
+
+The sliders snap to fixed steps, so the same few loans (e.g. the default
+500,000 at 8.5% for 10 years) are requested over and over. loan_breakdown()
+keeps the numeric results (converted schedule arrays and summary figures,
+never UI objects) in an LRU cache keyed on the quantized inputs, the
+currency pair and the rate snapshot, so a rate refresh can't serve stale
+conversions.
+
+EMI_CACHE_SIZE (environment variable) sets the number of entries (default 1024).
+"""
+
+import functools
+import os
+from collections import namedtuple
+
+from emi_core import amortization_schedule
+from currency import get_rate_matrix
+
+EMI_CACHE_SIZE = int(os.getenv("EMI_CACHE_SIZE", "1024"))
+
+# emi / total_interest / total_payable: floats in the output currency
+# schedule: read-only arrays from emi_core.amortization_schedule, converted
+LoanBreakdown = namedtuple("LoanBreakdown", ["emi", "total_interest", "total_payable", "schedule"])
+
+
+def quantize_inputs(principal, annual_interest_rate, tenure_years):
+    """
+    Rounds inputs to the precision that affects the result (cents, 1/10000 of
+    a percent, whole months) so equal loans share one cache entry.
+    """
+    return round(float(principal), 2), round(float(annual_interest_rate), 4), int(round(float(tenure_years) * 12))
+
+
+@functools.lru_cache(maxsize=EMI_CACHE_SIZE)
+def _breakdown(principal, annual_interest_rate, tenure_months, from_currency_display, to_currency_display, rates):
+    # `rates` is a RateMatrix snapshot; it hashes by identity, so each rate refresh gets fresh entries.
+    # An unknown currency raises ValueError here, and lru_cache doesn't cache exceptions.
+    factor = rates.factor(from_currency_display, to_currency_display)
+    schedule = amortization_schedule(principal, annual_interest_rate, tenure_months)
+
+    converted = {"month": schedule["month"]}
+    for key, values in schedule.items():
+        if key != "month":
+            converted[key] = values * factor
+    for values in converted.values():
+        values.flags.writeable = False  # shared between requests
+
+    emi = float(schedule["emi"][0])
+    total_payment = emi * tenure_months
+    return LoanBreakdown(
+        emi=emi * factor,
+        total_interest=(total_payment - principal) * factor,
+        total_payable=total_payment * factor,
+        schedule=converted,
+    )
+
+
+def loan_breakdown(principal, annual_interest_rate, tenure_years, from_currency_display, to_currency_display, rates=None):
+    """EMI, totals and the month-by-month schedule of one loan, converted to the output currency."""
+    return _breakdown(*quantize_inputs(principal, annual_interest_rate, tenure_years),
+                      from_currency_display, to_currency_display, rates or get_rate_matrix())
+
+
+def cache_stats():
+    info = _breakdown.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": round(info.hits / lookups, 3) if lookups else None,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+    }
+
+
+def clear_cache():
+    _breakdown.cache_clear()
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""Exchange-rate providers and the background rate cache
+
+A provider's fetch() returns a RateQuote: rates per 1 USD keyed by ISO code.
+RateCache keeps the active rates in currency.py up to date:
+
+* startup loads the last-known-good snapshot from disk (or the built-in
+  rates) and never touches the network;
+* a daemon thread refreshes every EMI_RATE_TTL seconds;
+* when the rates are older than the TTL, requests keep using them
+  (stale-while-revalidate) and only nudge the refresher;
+* failed refreshes keep the old rates and retry with backoff.
+
+Lookups on the request path go through currency.get_rate_matrix(), which is
+a plain attribute read, so they never wait on I/O.
+
+Configuration (environment variables):
+    EMI_RATE_PROVIDER   "static" (default), "file" or "http"
+    EMI_RATE_URL        JSON endpoint for "http", e.g. https://open.er-api.com/v6/latest/USD
+    EMI_RATE_FILE       JSON file for "file"
+    EMI_RATE_TTL        seconds between refreshes (default 21600 = 6 hours)
+    EMI_RATE_SNAPSHOT   last-known-good snapshot path (default rates_snapshot.json)
+"""
+
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+import currency
+
+EMI_RATE_PROVIDER = os.getenv("EMI_RATE_PROVIDER", "static")
+EMI_RATE_URL = os.getenv("EMI_RATE_URL")
+EMI_RATE_FILE = os.getenv("EMI_RATE_FILE")
+EMI_RATE_TTL = float(os.getenv("EMI_RATE_TTL", "21600"))
+EMI_RATE_SNAPSHOT = os.getenv("EMI_RATE_SNAPSHOT", "rates_snapshot.json")
+HTTP_TIMEOUT = 10  # seconds
+MAX_RETRY_DELAY = 3600  # seconds
+
+# rates: {"EUR": 0.85, ...} per 1 USD; as_of: "YYYY-MM-DD"; source: provider name
+RateQuote = namedtuple("RateQuote", ["rates", "as_of", "source"])
+
+
+def _quote_from_json(data, source):
+    """
+    Reads {"base": "USD", "as_of": "...", "rates": {...}}. Also accepts the
+    "base_code" / "time_last_update_unix" fields used by common public rate APIs.
+    Rates in another base are rebased to USD.
+    """
+    rates = {code.upper(): float(rate) for code, rate in data["rates"].items()}
+    base = (data.get("base") or data.get("base_code") or "USD").upper()
+    if base != "USD":
+        if "USD" not in rates:
+            raise ValueError(f"{source}: rates are in {base} and have no USD rate to rebase on")
+        usd = rates["USD"]
+        rates = {code: rate / usd for code, rate in rates.items()}
+    rates["USD"] = 1.0
+
+    as_of = data.get("as_of") or data.get("date")
+    if not as_of and data.get("time_last_update_unix"):
+        as_of = time.strftime("%Y-%m-%d", time.gmtime(data["time_last_update_unix"]))
+    return RateQuote(rates, as_of or time.strftime("%Y-%m-%d", time.gmtime()), source)
+
+
+class StaticRateProvider:
+    """Fixed rates; the default (built-in table) and a fixture for local testing."""
+
+    def __init__(self, rates=None, as_of=None):
+        if rates is None:
+            rates = {currency.currency_codes[name]: rate for name, rate in currency.exchange_rates.items()}
+            as_of = as_of or currency.RATES_AS_OF
+        self.quote = RateQuote(dict(rates), as_of or time.strftime("%Y-%m-%d", time.gmtime()), "static")
+
+    def fetch(self):
+        return self.quote
+
+
+class FileRateProvider:
+    """Reads rates from a JSON file (same format as the snapshot)."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def fetch(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            return _quote_from_json(json.load(f), f"file:{self.path}")
+
+
+class HTTPRateProvider:
+    """Fetches rates from a JSON HTTP endpoint."""
+
+    def __init__(self, url, timeout=HTTP_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+
+    def fetch(self):
+        import urllib.request  # pulls in http.client/ssl; only needed by this provider
+
+        request = urllib.request.Request(self.url, headers={"Accept": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return _quote_from_json(json.load(response), f"http:{self.url}")
+
+
+def provider_from_env():
+    if EMI_RATE_PROVIDER == "http":
+        if not EMI_RATE_URL:
+            raise ValueError("EMI_RATE_PROVIDER=http needs EMI_RATE_URL")
+        return HTTPRateProvider(EMI_RATE_URL)
+    if EMI_RATE_PROVIDER == "file":
+        if not EMI_RATE_FILE:
+            raise ValueError("EMI_RATE_PROVIDER=file needs EMI_RATE_FILE")
+        return FileRateProvider(EMI_RATE_FILE)
+    if EMI_RATE_PROVIDER == "static":
+        return StaticRateProvider()
+    raise ValueError(f"Unknown EMI_RATE_PROVIDER: {EMI_RATE_PROVIDER}")
+
+
+class RateCache:
+    def __init__(self, provider, ttl=EMI_RATE_TTL, snapshot_path=EMI_RATE_SNAPSHOT):
+        self.provider = provider
+        self.ttl = ttl
+        self.snapshot_path = snapshot_path
+        self.fetched_at = 0.0       # wall-clock time of the active rates (0 = never fetched)
+        self.source = "built-in"
+        self.last_error = None
+        self.failures = 0
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # --- Applying rates ---
+    def _apply(self, quote, fetched_at):
+        """Merges a quote over the current rates (currencies it lacks keep their old rate) and swaps it in."""
+        by_code = {code: name for name, code in currency.currency_codes.items()}
+        rates = dict(currency.exchange_rates)
+        for code, rate in quote.rates.items():
+            name = by_code.get(code)
+            if name and rate > 0:
+                rates[name] = rate
+        currency.set_exchange_rates(rates, as_of=quote.as_of)
+        self.fetched_at = fetched_at
+        self.source = quote.source
+
+    def _save_snapshot(self, quote):
+        data = {"base": "USD", "as_of": quote.as_of, "source": quote.source,
+                "fetched_at": self.fetched_at, "rates": quote.rates}
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.snapshot_path)  # atomic: readers never see a half-written file
+
+    def load_snapshot(self):
+        """Loads the last-known-good rates from disk. Returns True if a snapshot was used."""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._apply(_quote_from_json(data, data.get("source", "snapshot")), float(data.get("fetched_at", 0)))
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Ignoring unreadable rate snapshot {self.snapshot_path}: {e}")
+            return False
+
+    # --- Refreshing ---
+    def refresh(self):
+        """Fetches from the provider now. On failure the current (stale) rates stay active."""
+        with self._lock:
+            try:
+                quote = self.provider.fetch()
+            except Exception as e:  # network, parse, missing file... keep serving the old rates
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"⚠️ Exchange-rate refresh failed ({self.failures} in a row): {self.last_error}")
+                return False
+            self._apply(quote, time.time())
+            self.failures = 0
+            self.last_error = None
+            if self.snapshot_path:
+                try:
+                    self._save_snapshot(quote)
+                except OSError as e:
+                    print(f"⚠️ Could not save rate snapshot: {e}")
+            return True
+
+    def is_stale(self):
+        return time.time() - self.fetched_at > self.ttl
+
+    def _next_delay(self):
+        if self.failures:
+            return min(MAX_RETRY_DELAY, 30 * 2 ** (self.failures - 1), self.ttl)
+        return max(1.0, self.fetched_at + self.ttl - time.time())
+
+    def _run(self):
+        while True:
+            if self.is_stale():
+                self.refresh()
+            self._wake.wait(self._next_delay())
+            self._wake.clear()
+
+    def start(self):
+        """Loads the snapshot and starts the background refresher. Never blocks on the network."""
+        if self._thread is not None:
+            return
+        self.load_snapshot()
+        self._thread = threading.Thread(target=self._run, name="rate-refresher", daemon=True)
+        self._thread.start()
+
+    def maybe_refresh(self):
+        """Request-path hook: returns at once, waking the refresher if the rates have expired."""
+        if self._thread is not None and self.is_stale() and not self.failures:
+            self._wake.set()
+
+    def stats(self):
+        matrix = currency.get_rate_matrix()
+        return {
+            "source": self.source,
+            "as_of": matrix.as_of,
+            "version": matrix.version,
+            "age_seconds": round(time.time() - self.fetched_at) if self.fetched_at else None,
+            "stale": self.is_stale(),
+            "last_error": self.last_error,
+        }
+
+
+rate_cache = RateCache(provider_from_env())
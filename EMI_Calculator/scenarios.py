@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""Scenario engine: rate changes and prepayments, many variants at once
+
+A scenario describes what happens to the base loan over time:
+
+    {
+        "name": "Refinance at 7% + yearly prepayment",
+        "rate_changes": [(25, 7.0)],              # (from month, new annual rate %)
+        "lump_sums": [(12, 100000)],              # (month, amount) one-off prepayments
+        "recurring": [(5000, 12, 12, None)],      # (amount, every N months, first month, last month or None)
+        "prepayment_effect": "tenure",            # "tenure": keep the EMI, finish sooner
+                                                  # "emi":    keep the end date, lower the EMI
+    }
+
+Months are 1-based like the amortization table. After a rate change the EMI
+is re-computed over the loan's remaining term (for "tenure" scenarios, the
+term already shortened by earlier prepayments).
+
+compare_scenarios() lays every scenario out as a row of (scenarios x months)
+rate and prepayment grids, then runs the amortization once: a single loop over
+the months where each step updates all scenarios with array operations. The
+base loan (no changes) is always row 0, so savings are reported against it.
+"""
+
+import numpy as np
+
+from emi_core import monthly_emi
+
+BASELINE_NAME = "Current loan"
+PAID_OFF = 0.005  # balances below half a cent count as repaid
+
+
+def _months_to_repay(balance, emi, monthly_rate):
+    """Payments of `emi` still needed to clear `balance` at `monthly_rate`: n = -log(1 - B*r/EMI) / log(1+r)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n = np.where(monthly_rate > 0,
+                     -np.log1p(-balance * monthly_rate / emi) / np.log1p(monthly_rate),
+                     balance / emi)
+    return np.ceil(np.nan_to_num(n, nan=np.inf) - 1e-9)
+
+
+def _scenario_grids(scenarios, annual_interest_rate, tenure_months):
+    """(rates %, prepayments, reduce_emi) grids with one row per scenario, baseline first."""
+    count = len(scenarios) + 1
+    rates = np.full((count, tenure_months), float(annual_interest_rate))
+    prepayments = np.zeros((count, tenure_months))
+    reduce_emi = np.zeros(count, dtype=bool)
+    months = np.arange(1, tenure_months + 1)
+
+    for row, scenario in enumerate(scenarios, start=1):
+        for month, rate in sorted(scenario.get("rate_changes", ())):
+            if rate < 0:
+                raise ValueError(f"{scenario.get('name', row)}: interest rate can't be negative")
+            rates[row, max(int(month), 1) - 1:] = rate
+        for month, amount in scenario.get("lump_sums", ()):
+            if 1 <= int(month) <= tenure_months:
+                prepayments[row, int(month) - 1] += amount
+        for amount, every, first, last in scenario.get("recurring", ()):
+            every = max(int(every), 1)
+            last = tenure_months if last is None else int(last)
+            due = (months >= int(first)) & (months <= last) & ((months - int(first)) % every == 0)
+            prepayments[row, due] += amount
+        effect = scenario.get("prepayment_effect", "tenure")
+        if effect not in ("tenure", "emi"):
+            raise ValueError(f"Unknown prepayment_effect: {effect}")
+        reduce_emi[row] = effect == "emi"
+    return rates, prepayments, reduce_emi
+
+
+def compare_scenarios(principal, annual_interest_rate, tenure_years, scenarios):
+    """
+    Amortizes the base loan and every scenario in one vectorized pass.
+    Returns a dict:
+        "names":    scenario names, baseline first
+        "summary":  {"first_emi", "last_emi", "total_interest", "total_prepaid",
+                     "total_paid", "payoff_month", "interest_saved", "months_saved"} arrays
+        "schedule": {"balance", "interest", "principal", "payment", "prepayment"}
+                    arrays of shape (scenarios, months); balance is after the month's payments
+    """
+    tenure_months = int(round(tenure_years * 12))
+    if principal <= 0 or tenure_months <= 0 or annual_interest_rate < 0:
+        raise ValueError("Please enter valid positive numbers!")
+
+    rates, prepayments, reduce_emi = _scenario_grids(scenarios, annual_interest_rate, tenure_months)
+    count = rates.shape[0]
+    monthly_rates = rates / (12 * 100)  # shared by every step below
+    remaining = tenure_months - np.arange(tenure_months)  # payments left, including this month
+    rate_changed = np.zeros_like(rates, dtype=bool)
+    rate_changed[:, 1:] = rates[:, 1:] != rates[:, :-1]
+
+    balance = np.full(count, float(principal))
+    emi = monthly_emi(balance, rates[:, 0], tenure_months)
+    prepaid_last_month = np.zeros(count, dtype=bool)
+    shape = (count, tenure_months)
+    out = {key: np.zeros(shape) for key in ("balance", "interest", "principal", "payment", "prepayment")}
+
+    for m in range(tenure_months):
+        open_loans = balance > PAID_OFF
+        # Re-amortize over the remaining term after a rate change, or after a prepayment when lowering the EMI
+        recompute = open_loans & (rate_changed[:, m] | (reduce_emi & prepaid_last_month))
+        if recompute.any():
+            term = np.full(count, float(remaining[m]))
+            if m:
+                keep_emi = recompute & ~reduce_emi
+                term[keep_emi] = np.minimum(term[keep_emi], _months_to_repay(
+                    balance[keep_emi], emi[keep_emi], monthly_rates[keep_emi, m - 1]))
+            term = np.maximum(term, 1)
+            emi[recompute] = monthly_emi(balance[recompute], rates[recompute, m], term[recompute])
+
+        interest = np.where(open_loans, balance * monthly_rates[:, m], 0.0)
+        principal_paid = np.where(open_loans, np.minimum(emi - interest, balance), 0.0)
+        balance = balance - principal_paid
+        prepayment = np.minimum(prepayments[:, m], balance)
+        balance = balance - prepayment
+        prepaid_last_month = prepayment > 0
+
+        out["interest"][:, m] = interest
+        out["principal"][:, m] = principal_paid
+        out["payment"][:, m] = interest + principal_paid
+        out["prepayment"][:, m] = prepayment
+        out["balance"][:, m] = balance
+
+    paid = out["payment"] > 0
+    payoff_month = np.where(paid.any(axis=1), tenure_months - np.argmax(paid[:, ::-1], axis=1), 0)
+    total_interest = out["interest"].sum(axis=1)
+    total_prepaid = out["prepayment"].sum(axis=1)
+    last_emi = out["payment"][np.arange(count), np.maximum(payoff_month - 2, 0)]  # before the (smaller) final payment
+
+    summary = {
+        "first_emi": out["payment"][:, 0],
+        "last_emi": last_emi,
+        "total_interest": total_interest,
+        "total_prepaid": total_prepaid,
+        "total_paid": out["payment"].sum(axis=1) + total_prepaid,
+        "payoff_month": payoff_month,
+        "interest_saved": total_interest[0] - total_interest,
+        "months_saved": payoff_month[0] - payoff_month,
+    }
+    names = [BASELINE_NAME] + [s.get("name") or f"Scenario {i}" for i, s in enumerate(scenarios, start=1)]
+    return {"names": names, "summary": summary, "schedule": out}
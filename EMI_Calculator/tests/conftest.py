@@ -0,0 +1,7 @@
+import os
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The app is a flat set of modules; make them importable from the tests.
+sys.path.insert(0, APP_DIR)
@@ -0,0 +1,121 @@
+import http.client
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import api
+from api import price_batch, price_ndjson, price_one
+from currency import get_rate_matrix, resolve_currency
+from emi_core import monthly_emi
+
+LOAN = {"principal": 500000, "annual_interest_rate": 8.5, "tenure_years": 10}
+EMI = float(monthly_emi(500000, 8.5, 120))
+
+
+def rows(lines, **kwargs):
+    return [json.loads(out) for out in price_ndjson(lines, **kwargs)]
+
+
+def test_price_one():
+    result = price_one(LOAN)
+    assert result["emi"] == pytest.approx(EMI)
+    assert result["total_payable"] == pytest.approx(EMI * 120)
+    assert result["total_interest"] == pytest.approx(EMI * 120 - 500000)
+    assert result["currency"] == resolve_currency("USD")
+    assert "schedule" not in result
+
+
+def test_price_one_converts_and_returns_schedule():
+    factor = float(get_rate_matrix().factor(resolve_currency("USD"), resolve_currency("INR")))
+    result = price_one(dict(LOAN, input_currency="USD", output_currency="INR", schedule=True))
+    assert result["emi"] == pytest.approx(EMI * factor)
+    assert len(result["schedule"]["month"]) == 120
+    assert result["schedule"]["ending_balance"][-1] == pytest.approx(0, abs=1e-6)
+
+
+@pytest.mark.parametrize("loan", [dict(LOAN, principal=0), dict(LOAN, annual_interest_rate=-1), dict(LOAN, tenure_years=0),
+                                  dict(LOAN, output_currency="XYZ")])
+def test_price_one_rejects_invalid_loans(loan):
+    with pytest.raises(ValueError):
+        price_one(loan)
+
+
+def test_price_batch():
+    result = price_batch({"principal": [500000, 250000, -1], "annual_interest_rate": [8.5, 0, 5],
+                          "tenure_years": [10, 5, 5]})
+    assert result["emi"][0] == pytest.approx(EMI)
+    assert result["emi"][1] == pytest.approx(250000 / 60)
+    assert result["emi"][2] is None  # invalid loans give null, not an error
+    assert result["currency"] == resolve_currency("USD")
+
+    by_months = price_batch({"principal": [500000], "annual_interest_rate": [8.5], "tenure_months": [120]})
+    assert by_months["emi"] == result["emi"][:1]
+
+
+def test_price_ndjson_keeps_order_ids_and_skips_blank_lines():
+    lines = [json.dumps(dict(LOAN, id="a")), "\n", json.dumps(dict(LOAN, principal=250000, id=7)) + "\n"]
+    out = rows(lines, chunk_size=1)
+    assert [r["id"] for r in out] == ["a", 7]
+    assert out[0]["emi"] == pytest.approx(EMI)
+    assert out[1]["emi"] == pytest.approx(EMI / 2)
+
+
+def test_price_ndjson_bad_lines_yield_errors_not_exceptions():
+    good = (json.dumps(LOAN) + "\n").encode("utf-8")
+    lines = [good, b"\xff\xfe\n", b"{not json\n", b'{"principal": 1}\n', good]
+    out = rows(lines)
+    assert out[0]["emi"] == pytest.approx(EMI) and out[-1]["emi"] == pytest.approx(EMI)
+    assert out[1]["error"].startswith("UnicodeDecodeError")
+    assert out[2]["error"].startswith("JSONDecodeError")
+    assert out[3]["error"].startswith("KeyError")
+
+
+def test_price_ndjson_rejects_over_long_lines(monkeypatch):
+    monkeypatch.setattr(api, "MAX_LINE_BYTES", 100)
+    padded = json.dumps(dict(LOAN, note="x" * 200))
+    out = rows([padded, json.dumps(LOAN)])
+    assert out[0] == {"error": "ValueError: line longer than 100 bytes"}
+    assert out[1]["emi"] == pytest.approx(EMI)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), api.EMIRequestHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def post(address, path, body):
+    conn = http.client.HTTPConnection(*address, timeout=10)
+    conn.request("POST", path, body=body)
+    response = conn.getresponse()
+    data = response.read()  # raises IncompleteRead if the chunked body isn't terminated
+    conn.close()
+    return response.status, data
+
+
+def test_emi_endpoint(server):
+    status, body = post(server, "/emi", json.dumps(LOAN))
+    assert status == 200 and json.loads(body)["emi"] == pytest.approx(EMI)
+    status, body = post(server, "/emi", json.dumps({"principal": 1}))
+    assert status == 400 and json.loads(body)["error"].startswith("KeyError")
+
+
+def test_stream_endpoint_survives_bad_and_over_long_lines(server, monkeypatch):
+    monkeypatch.setattr(api, "MAX_LINE_BYTES", 100)
+    good = (json.dumps(LOAN) + "\n").encode("utf-8")
+    long_line = json.dumps(dict(LOAN, note="x" * 500)).encode("utf-8") + b"\n"
+    status, body = post(server, "/stream", good + b"\xff\xfe\n" + long_line + good)
+    assert status == 200
+    out = [json.loads(line) for line in body.decode("utf-8").splitlines()]
+    assert len(out) == 4  # the long line is one error row, not several
+    assert out[1]["error"].startswith("UnicodeDecodeError")
+    assert out[2]["error"] == "ValueError: line longer than 100 bytes"
+    assert out[0]["emi"] == out[3]["emi"] == pytest.approx(EMI)
@@ -0,0 +1,32 @@
+import io
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import cli
+from emi_core import monthly_emi
+
+EMI = float(monthly_emi(500000, 8.5, 120))
+
+
+def test_emi_command(capsys):
+    cli.main(["emi", "500000", "8.5", "10"])
+    assert json.loads(capsys.readouterr().out)["emi"] == pytest.approx(EMI)
+
+
+def test_emi_command_reports_invalid_loans(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(["emi", "500000", "8.5", "10", "--to", "XYZ"])
+    assert exit_info.value.code == 1
+    assert "Unknown currency: XYZ" in capsys.readouterr().err
+
+
+def test_stream_command(capsys, monkeypatch):
+    loan = json.dumps({"id": 1, "principal": 500000, "annual_interest_rate": 8.5, "tenure_years": 10})
+    monkeypatch.setattr("sys.stdin", io.StringIO(f"{loan}\nnot json\n"))
+    cli.main(["stream"])
+    out = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert out[0]["id"] == 1 and out[0]["emi"] == pytest.approx(EMI)
+    assert "error" in out[1]
@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("numpy")
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["gradio", "pandas", "matplotlib"]
+# Generous enough for a cold CI machine; numpy alone is most of it
+IMPORT_BUDGET_MS = float(os.getenv("EMI_IMPORT_BUDGET_MS", "1500"))
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import emi_core, currency, api
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def probe():
+    proc = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, timeout=120, cwd=APP_DIR)
+    assert proc.returncode == 0, proc.stderr
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def test_core_imports_without_heavy_libraries():
+    assert probe()["heavy"] == []
+
+
+def test_core_import_time_within_budget():
+    best = min(probe()["ms"] for _ in range(3))  # best of 3 to ride out a noisy machine
+    assert best < IMPORT_BUDGET_MS, f"import emi_core, currency, api took {best:.1f} ms (budget {IMPORT_BUDGET_MS:g} ms)"
@@ -0,0 +1,176 @@
+import json
+import os
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import currency
+import rate_providers
+from rate_providers import FileRateProvider, RateCache, StaticRateProvider
+
+EUR = currency.resolve_currency("EUR")
+USD = currency.resolve_currency("USD")
+
+
+@pytest.fixture(autouse=True)
+def restore_rates(monkeypatch):
+    """RateCache swaps rates into currency.py; put the built-in table back afterwards."""
+    monkeypatch.setattr(currency, "_matrix", currency._matrix)
+    monkeypatch.setattr(currency, "exchange_rates", currency.exchange_rates)
+
+
+class CountingProvider:
+    def __init__(self, provider):
+        self.provider = provider
+        self.calls = 0
+
+    def fetch(self):
+        self.calls += 1
+        return self.provider.fetch()
+
+
+def write_rates(path, eur, as_of="2026-01-02"):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"base": "USD", "as_of": as_of, "rates": {"EUR": eur}}, f)
+
+
+def eur_rate():
+    return float(currency.get_rate_matrix().factor(USD, EUR))
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_refresh_applies_rates_and_saves_snapshot(tmp_path):
+    cache = RateCache(StaticRateProvider({"EUR": 0.5}, as_of="2026-01-02"), ttl=60,
+                      snapshot_path=str(tmp_path / "rates_snapshot.json"))
+    assert cache.is_stale()  # never fetched
+    assert cache.refresh()
+    assert eur_rate() == pytest.approx(0.5)
+    assert currency.get_rate_matrix().as_of == "2026-01-02"
+    assert not cache.is_stale()
+
+    with open(tmp_path / "rates_snapshot.json", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    assert snapshot["rates"]["EUR"] == 0.5 and snapshot["source"] == "static"
+    assert os.listdir(tmp_path) == ["rates_snapshot.json"]  # no temp file left behind
+
+
+def test_expired_rates_wake_the_refresher(tmp_path):
+    provider = CountingProvider(StaticRateProvider({"EUR": 0.5}))
+    cache = RateCache(provider, ttl=3600, snapshot_path=str(tmp_path / "rates_snapshot.json"))
+    cache.start()
+    wait_for(lambda: provider.calls == 1)  # nothing loaded yet, so the first pass refreshes
+
+    cache.maybe_refresh()  # still fresh: no extra fetch
+    time.sleep(0.05)
+    assert provider.calls == 1
+
+    cache.fetched_at -= 3601  # TTL expired
+    assert cache.is_stale()
+    cache.maybe_refresh()
+    wait_for(lambda: provider.calls == 2)
+    wait_for(lambda: not cache.is_stale())
+
+
+def test_failed_refresh_keeps_last_known_good_and_backs_off(tmp_path):
+    rates_file = tmp_path / "rates.json"
+    write_rates(rates_file, 0.5)
+    cache = RateCache(FileRateProvider(str(rates_file)), ttl=21600, snapshot_path=None)
+    assert cache.refresh()
+    fetched_at = cache.fetched_at
+
+    os.remove(rates_file)
+    assert not cache.refresh()
+    assert eur_rate() == pytest.approx(0.5)
+    assert cache.fetched_at == fetched_at
+    assert cache.last_error.startswith("FileNotFoundError")
+    assert cache._next_delay() == 30
+    assert not cache.refresh()
+    assert cache._next_delay() == 60
+
+    # Requests don't keep nudging a failing refresher; it retries on its backoff schedule
+    cache._thread = object()
+    cache.fetched_at = 0
+    cache.maybe_refresh()
+    assert not cache._wake.is_set()
+
+    write_rates(rates_file, 0.6)
+    assert cache.refresh()
+    assert (cache.failures, cache.last_error) == (0, None)
+    assert eur_rate() == pytest.approx(0.6)
+
+
+def test_backoff_is_capped_by_the_ttl(tmp_path):
+    cache = RateCache(FileRateProvider(str(tmp_path / "missing.json")), ttl=45, snapshot_path=None)
+    for _ in range(3):
+        cache.refresh()
+    assert cache._next_delay() == 45
+
+
+@pytest.mark.parametrize("content", ["{not json", json.dumps({"base": "USD"}), json.dumps({"rates": {"EUR": "x"}})])
+def test_load_snapshot_ignores_corrupt_file(tmp_path, content):
+    before = eur_rate()
+    snapshot = tmp_path / "rates_snapshot.json"
+    snapshot.write_text(content, encoding="utf-8")
+    cache = RateCache(StaticRateProvider(), snapshot_path=str(snapshot))
+    assert not cache.load_snapshot()
+    assert eur_rate() == before
+    assert cache.fetched_at == 0
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "rates_snapshot.json")
+    RateCache(StaticRateProvider({"EUR": 0.7}), snapshot_path=path).refresh()
+    currency.set_exchange_rates(dict(currency.exchange_rates, **{EUR: 0.9}))
+
+    cache = RateCache(StaticRateProvider(), snapshot_path=path)
+    assert cache.load_snapshot()
+    assert eur_rate() == pytest.approx(0.7)
+    assert cache.fetched_at > 0
+    assert not RateCache(StaticRateProvider(), snapshot_path=str(tmp_path / "missing.json")).load_snapshot()
+
+
+def test_save_snapshot_replaces_atomically(tmp_path, monkeypatch):
+    path = str(tmp_path / "rates_snapshot.json")
+    write_rates(path, 0.5)
+    seen = []
+    real_replace = os.replace
+
+    def checking_replace(src, dst):
+        # The new snapshot is complete in the temp file while the old one is still in place
+        with open(src, encoding="utf-8") as f:
+            seen.append(json.load(f)["rates"]["EUR"])
+        with open(dst, encoding="utf-8") as f:
+            seen.append(json.load(f)["rates"]["EUR"])
+        real_replace(src, dst)
+
+    monkeypatch.setattr(rate_providers.os, "replace", checking_replace)
+    RateCache(StaticRateProvider({"EUR": 0.8}), snapshot_path=path).refresh()
+    assert seen == [0.8, 0.5]
+    assert os.listdir(tmp_path) == ["rates_snapshot.json"]
+
+
+def test_provider_from_env(monkeypatch):
+    monkeypatch.setattr(rate_providers, "EMI_RATE_PROVIDER", "static")
+    assert isinstance(rate_providers.provider_from_env(), StaticRateProvider)
+
+    monkeypatch.setattr(rate_providers, "EMI_RATE_PROVIDER", "file")
+    monkeypatch.setattr(rate_providers, "EMI_RATE_FILE", "rates.json")
+    assert isinstance(rate_providers.provider_from_env(), FileRateProvider)
+
+
+@pytest.mark.parametrize("name, error", [("ftp", "Unknown EMI_RATE_PROVIDER"), ("http", "needs EMI_RATE_URL"),
+                                         ("file", "needs EMI_RATE_FILE")])
+def test_provider_from_env_rejects_bad_configuration(monkeypatch, name, error):
+    monkeypatch.setattr(rate_providers, "EMI_RATE_PROVIDER", name)
+    monkeypatch.setattr(rate_providers, "EMI_RATE_URL", None)
+    monkeypatch.setattr(rate_providers, "EMI_RATE_FILE", None)
+    with pytest.raises(ValueError, match=error):
+        rate_providers.provider_from_env()
@@ -0,0 +1,47 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from emi_core import amortization_schedule
+from scenarios import BASELINE_NAME, compare_scenarios
+
+
+@pytest.mark.parametrize("rate", [8.5, 0.0])
+def test_baseline_matches_amortization_schedule(rate):
+    result = compare_scenarios(500000, rate, 10, [])
+    schedule = amortization_schedule(500000, rate, 120)
+    assert result["names"] == [BASELINE_NAME]
+
+    np.testing.assert_allclose(result["schedule"]["interest"][0], schedule["interest_paid"], atol=1e-6)
+    np.testing.assert_allclose(result["schedule"]["principal"][0], schedule["principal_paid"], atol=1e-6)
+    np.testing.assert_allclose(result["schedule"]["balance"][0], np.maximum(schedule["ending_balance"], 0), atol=1e-6)
+    summary = result["summary"]
+    assert summary["first_emi"][0] == pytest.approx(schedule["emi"][0])
+    assert summary["total_interest"][0] == pytest.approx(schedule["interest_paid"].sum())
+    assert summary["payoff_month"][0] == 120
+    assert summary["interest_saved"][0] == summary["months_saved"][0] == 0
+
+
+def test_prepayments_save_interest_against_the_baseline():
+    scenarios = [
+        {"name": "Lump sum", "lump_sums": [(12, 100000)]},
+        {"name": "Lower EMI", "lump_sums": [(12, 100000)], "prepayment_effect": "emi"},
+        {"name": "Refinance", "rate_changes": [(25, 7.0)]},
+    ]
+    result = compare_scenarios(500000, 8.5, 10, scenarios)
+    summary = result["summary"]
+    assert result["names"] == [BASELINE_NAME, "Lump sum", "Lower EMI", "Refinance"]
+    assert (summary["interest_saved"][1:] > 0).all()
+    assert summary["months_saved"][1] > 0             # "tenure": same EMI, finishes sooner
+    assert summary["months_saved"][2] == 0            # "emi": same end date, lower EMI
+    assert summary["last_emi"][2] < summary["first_emi"][2]
+    assert (result["schedule"]["balance"][:, -1] < 0.01).all()
+
+
+def test_invalid_scenarios_are_rejected():
+    with pytest.raises(ValueError):
+        compare_scenarios(500000, 8.5, 10, [{"prepayment_effect": "sooner"}])
+    with pytest.raises(ValueError):
+        compare_scenarios(500000, 8.5, 10, [{"rate_changes": [(3, -1.0)]}])
+    with pytest.raises(ValueError):
+        compare_scenarios(0, 8.5, 10, [])
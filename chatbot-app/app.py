@@ -2,7 +2,7 @@ import sqlite3
 import os
 import bcrypt
 import requests
-from flask import Flask, request, session, jsonify, g, send_from_directory
+from flask import Flask, request, session, jsonify, g, send_from_directory, Response, render_template
 from flask_cors import CORS
 from datetime import datetime, timedelta
 from fpdf import FPDF
@@ -10,16 +10,27 @@ import tempfile
 import threading
 import time
 import html
+import hmac
 import re
-from chatbot import ask_groq  # Import the ask_groq function from chatbot.py
+from chatbot import ask_groq, is_error_reply, select_model, model_stats  # Import the ask_groq function from chatbot.py
 from db import init_db, get_db, close_db # Import database functions
 from auth import create_user, verify_user # Import auth functions
+from prompts import build_export_messages # Import prompt assembly
+from parsers import parse_summary, parse_flashcards # Import LLM output parsing
+from flashcards import update_conversation_flashcards, last_covered_message_id, export_assets # Import flashcard storage
+from review import next_due_card, record_review # Import spaced repetition
+from response_cache import response_cache # Import first-turn response cache
+from scheduler import llm_scheduler # Import LLM request scheduler
+from write_behind import message_writer # Import batched message persistence
+from ownership import ownership_cache # Import conversation ownership cache
+from archive import restore_conversation # Import cold-storage restore
 
 
 # --- Flask App Setup ---
 app = Flask(__name__, static_folder='assets')
 app.secret_key = "supercutesecret"  # IMPORTANT: Use a strong, random secret key in production!
 CORS(app, supports_credentials=True)
+STATS_TOKEN = os.getenv("STATS_TOKEN")  # optional; without it /stats only answers localhost
 
 # Register the teardown function here
 app.teardown_appcontext(close_db)
@@ -28,20 +39,58 @@ app.teardown_appcontext(close_db)
 init_db()
 
 # --- Helper for Conversation Management ---
-def get_or_create_default_conversation(user_id):
+def get_current_conversation(user_id):
+    """
+    Returns the session's conversation if the user owns it, else None.
+    Conversations are only created once their first message arrives (see create_conversation).
+    """
+    conv_id = session.get("current_conversation_id")
+    if conv_id and ownership_cache.owns(get_db(), user_id, conv_id):
+        return conv_id
+    return None
+
+def create_conversation(user_id):
     db = get_db()
-    if "current_conversation_id" in session and session["current_conversation_id"]:
-        conv = db.execute("SELECT id FROM conversations WHERE id = ? AND user_id = ?",
-                          (session["current_conversation_id"], user_id)).fetchone()
-        if conv:
-            return session["current_conversation_id"]
-
     cursor = db.execute("INSERT INTO conversations (user_id, title) VALUES (?, ?)",
                         (user_id, f"Chat {datetime.now().strftime('%Y-%m-%d %H:%M')}"))
     new_conv_id = cursor.lastrowid
     db.commit()
+    ownership_cache.add(user_id, new_conv_id)
     return new_conv_id
 
+def ensure_hot(db, conv_id):
+    """Restores an archived conversation's messages before they are read (see archive.py)."""
+    message_writer.barrier(conv_id)
+    restore_conversation(db, conv_id)
+
+def list_conversations(user_id):
+    """
+    Returns the sidebar list: the user's non-empty conversations, most recently active first.
+    Archived conversations are listed from their archive row without being restored.
+    """
+    message_writer.barrier()
+    db = get_db()
+    convs = db.execute(
+        """
+        SELECT c.id, c.title,
+               COALESCE(a.preview, (SELECT message FROM messages WHERE conversation_id = c.id ORDER BY timestamp ASC LIMIT 1)) as preview,
+               COALESCE((SELECT MAX(timestamp) FROM messages WHERE conversation_id = c.id), a.last_message_at) as last_message_at
+        FROM conversations c
+        LEFT JOIN conversation_archives a ON a.conversation_id = c.id
+        WHERE c.user_id = ? AND (a.conversation_id IS NOT NULL OR EXISTS (SELECT 1 FROM messages WHERE conversation_id = c.id))
+        ORDER BY last_message_at DESC
+        """, (user_id,)
+    ).fetchall()
+    
+    # Modify this line to use c["title"] for the primary display
+    conv_list = []
+    for c in convs:
+        display_title = c["title"] # Use the conversation's title
+        if c["preview"] and c["preview"] != display_title: # If preview is different, append it
+            display_title = f"{display_title} - {c['preview'][:30]}..." if len(c['preview']) > 30 else f"{display_title} - {c['preview']}"
+        conv_list.append({"id": c["id"], "title": display_title})
+    return conv_list
+
 def delete_file_later(path, delay=300):
     """Deletes a file after a specified delay."""
     def _delete():
@@ -55,20 +104,85 @@ def delete_file_later(path, delay=300):
     if path:
         threading.Thread(target=_delete, daemon=True).start()
 
+def stream_file(path, chunk_size=64 * 1024):
+    """Yields a file in chunks and deletes it once it has been fully sent."""
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"Error deleting file {path}: {e}")
+
+def stream_export(path, download_name, mimetype):
+    """Returns an export file directly in the response instead of a path to fetch later."""
+    headers = {
+        "Content-Disposition": f'attachment; filename="{download_name}"',
+        "Content-Length": str(os.path.getsize(path)),
+    }
+    return Response(stream_file(path), mimetype=mimetype, headers=headers, direct_passthrough=True)
+
 # --- PDF Generation Classes and Helpers ---
+# Stand-ins for characters the loaded font has no glyph for (tried in order).
+FALLBACK_CHARS = {
+    "💖": ("♥", "<3"),
+    "\u2018": ("'",), "\u2019": ("'",), "\u201c": ('"',), "\u201d": ('"',),
+    "\u2013": ("-",), "\u2014": ("-",), "\u2022": ("*",), "\u2026": ("...",),
+    "\u00a0": (" ",), "\u2192": ("->",), "\u2190": ("<-",), "\u2264": ("<=",), "\u2265": (">=",),
+    "\u00d7": ("x",), "\u2248": ("~",),
+}
+
+class GlyphTable(dict):
+    """
+    str.translate() table for one font: characters the font can draw map to
+    themselves, others to a fallback or are dropped. Entries are computed once
+    per character and cached, so each line is cleaned with a single translate().
+    """
+    def __init__(self, supported):
+        super().__init__()
+        self.supported = supported
+
+    def __missing__(self, codepoint):
+        if codepoint in self.supported or codepoint in (10, 13):
+            value = codepoint
+        else:
+            value = ""
+            for substitute in FALLBACK_CHARS.get(chr(codepoint), ()):
+                if all(ord(c) in self.supported for c in substitute):
+                    value = substitute
+                    break
+        self[codepoint] = value
+        return value
+
+_glyph_tables = {}
+
+def glyph_table(pdf_obj):
+    """Returns the (cached) translate table for the PDF's current font."""
+    font = pdf_obj.current_font
+    key = getattr(pdf_obj, "font_family", "") + getattr(pdf_obj, "font_style", "")
+    table = _glyph_tables.get(key)
+    if table is None:
+        cmap = getattr(font, "cmap", None)
+        if cmap is None and isinstance(font, dict):
+            cmap = font.get("cmap")
+        # Core fonts (the Arial fallback) only cover Latin-1
+        supported = frozenset(cmap) if cmap else frozenset(range(0x20, 0x100))
+        table = _glyph_tables[key] = GlyphTable(supported)
+    return table
+
 def safe_multicell(pdf_obj, line):
-    """Safely add a multi-line cell to a PDF, handling potential encoding errors."""
+    """Safely add a multi-line cell to a PDF, keeping every character the current font can draw."""
+    cleaned = line.translate(glyph_table(pdf_obj))
+    page_width = pdf_obj.w - 2 * pdf_obj.l_margin
     try:
-        cleaned = re.sub(r'[^\x20-\x7E\n\r]', '', line)  # Keep basic printable chars and newlines
-        page_width = pdf_obj.w - 2 * pdf_obj.l_margin
         pdf_obj.multi_cell(page_width, 6, cleaned)
     except Exception as e:
         print(f"⚠️ PDF error in safe_multicell: {e} for line: {line[:50]}...")
-        truncated = cleaned[:200] + "..." if len(cleaned) > 200 else cleaned
-        try:
-            pdf_obj.multi_cell(page_width, 6, truncated)
-        except Exception as e_fallback:
-            print(f"⚠️ PDF fallback multi_cell also failed: {e_fallback}")
 
 class CustomPDF(FPDF):
     """A custom PDF class to handle headers and Unicode fonts."""
@@ -101,7 +215,7 @@ class CustomPDF(FPDF):
             self.set_font('Arial', 'B', 12)
         self.set_fill_color(200, 220, 255)
         from fpdf.enums import XPos, YPos
-        self.cell(0, 10, title, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L', fill=True)
+        self.cell(0, 10, title.translate(glyph_table(self)), new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='L', fill=True)
         self.ln(4)
 
     def chapter_body(self, body):
@@ -113,76 +227,84 @@ class CustomPDF(FPDF):
         self.ln(6)
 
 
-# --- HTML Flashcard Generation ---
-def generate_flashcards_html(flashcards_text):
-    """Generates an HTML string for interactive flashcards."""
-    cards_html = []
-    current_topic = ""
-    current_question_text = None
-
-    lines = flashcards_text.split('\n')
-    for line in lines:
-        line = line.strip()
-        question_match = re.match(r'Q:\s*(.*)', line, re.IGNORECASE)
-        answer_match = re.match(r'A:\s*(.*)', line, re.IGNORECASE)
-
-        if line.startswith("=== ") and line.endswith(" ==="):
-            current_topic = html.escape(line.replace("===", "").strip())
-        elif question_match:
-            current_question_text = question_match.group(1).strip()
-        elif answer_match and current_question_text is not None:
-            escaped_question = html.escape(current_question_text)
-            escaped_answer = html.escape(answer_match.group(1).strip())
-            cards_html.append(f"""
-            <div class="flashcard-container">
-                <div class="flashcard" onclick="this.classList.toggle('flipped');">
-                    <div class="flashcard-front"><p class="card-question">{escaped_question}</p></div>
-                    <div class="flashcard-back"><p class="card-answer">{escaped_answer}</p></div>
-                </div>
-                <div class="flashcard-topic">{current_topic}</div>
-            </div>
-            """)
-            current_question_text = None
+# --- Summary Rendering ---
+def render_summary_pdf(pdf, summary_doc):
+    """Writes a parsed summary (see parsers.parse_summary) into the PDF."""
+    for topic in summary_doc:
+        if topic["title"]:
+            pdf.ensure_space(20)
+            pdf.chapter_title(topic["title"])
+            pdf.ln(4)
+        for section in topic["sections"]:
+            if section["label"]:
+                pdf.ensure_space(15)
+                pdf.set_font('', 'B')
+                safe_multicell(pdf, section["label"] + ":")
+                pdf.ln(3)
+            pdf.set_font('', '')
+            for line in section["lines"]:
+                pdf.ensure_space(10)
+                safe_multicell(pdf, line)
+                pdf.ln(2)
+
+def render_summary_html(summary_doc):
+    """Generates an HTML page for a parsed summary (see parsers.parse_summary)."""
+    parts = []
+    for topic in summary_doc:
+        if topic["title"]:
+            parts.append(f"<h2>{html.escape(topic['title'])}</h2>")
+        for section in topic["sections"]:
+            if section["label"]:
+                parts.append(f"<h3>{html.escape(section['label'])}</h3>")
+            parts.extend(f"<p>{html.escape(line)}</p>" for line in section["lines"])
 
     return f"""
 <!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
-    <title>Query Quokka Flashcards</title>
-    <link href="https://fonts.googleapis.com/css2?family=Love+Ya+Like+A+Sister&display=swap" rel="stylesheet">
+    <title>Query Quokka Learning Material</title>
     <style>
-        body {{ font-family: 'Arial', sans-serif; background-color: #FFFFFF; display: flex; flex-direction: column; align-items: center; padding: 20px; }}
-        h1 {{ color: #6c493b; font-family: 'Love Ya Like A Sister', cursive; }}
-        /* Style for the logo image */
-        .logo-container {{
-            text-align: center; /* Center the image */
-            margin-bottom: 20px; /* Add some space below the logo */
-        }}
-        .logo-container img {{
-            max-width: 200px; /* Adjust the size as needed */
-            height: auto;
-        }}
-        .flashcards-grid {{ display: flex; flex-wrap: wrap; gap: 20px; justify-content: center; }}
-        .flashcard-container {{ perspective: 1000px; width: 300px; height: 200px; margin-bottom: 20px; }}
-        .flashcard {{ width: 100%; height: 100%; position: absolute; transform-style: preserve-3d; transition: transform 0.6s; border-radius: 15px; box-shadow: 0 4px 8px rgba(0,0,0,0.2); cursor: pointer; }}
-        .flashcard.flipped {{ transform: rotateY(180deg); }}
-        .flashcard-front {{ position: absolute; width: 100%; height: 100%; backface-visibility: hidden; display: flex; justify-content: center; align-items: center; padding: 15px; box-sizing: border-box; box-shadow: 0 0 15px 5px rgba(108, 73, 59, 0.5) !important; border-radius: 20px; text-align: center; font-family: 'Love Ya Like A Sister', cursive; font-size: 1.2em; color: #ffffff; }} /* Text color for cards */
-        .flashcard-back {{ position: absolute; width: 100%; height: 100%; backface-visibility: hidden; display: flex; justify-content: center; align-items: center; padding: 15px; box-sizing: border-box; box-shadow: 0 0 15px 5px rgba(108, 73, 59, 0.5) !important; border-radius: 20px; text-align: center; font-family: 'Love Ya Like A Sister', cursive; font-size: 1.2em; color: #ffffff; }} /* Text color for cards */    
-        .flashcard-front {{ background-color: #b77a5a;}} /* Lightest background, medium border */
-        .flashcard-back {{ background-color: #6c493b; transform: rotateY(180deg); }} /* Medium background, darkest border */
-        .flashcard-topic {{ position: absolute; bottom: -25px; left: 0; right: 0; text-align: center; font-family: 'Love Ya Like A Sister', cursive; font-size: 0.9em; color: #6c493b; font-weight: bold; }} /* Darkest text for topic */
+        body {{ font-family: 'Arial', sans-serif; max-width: 800px; margin: 0 auto; padding: 20px; }}
+        h1 {{ color: #6c493b; }}
+        h2 {{ background-color: rgb(200, 220, 255); padding: 6px 10px; }}
     </style>
 </head>
 <body>
-    <div class="logo-container">
-        <img src="https://github.com/MahekTrivedi44/logo/blob/main/logo.png?raw=true" alt="Query Quokka Logo">
-    </div>
-    <div class="flashcards-grid">{''.join(cards_html)}</div>
+    <h1>💖 Query Quokka Learning Material 💖</h1>
+    {''.join(parts)}
 </body>
 </html>
 """
 
+
+# --- HTML Flashcard Generation ---
+def generate_flashcards_html(cards, client_side=False):
+    """
+    Generates an HTML page for interactive flashcards (see parsers.parse_flashcards)
+    from the precompiled templates/flashcards.html. The file is downloaded and opened
+    from disk, so the CSS/JS from assets/ are inlined (read once per process); the
+    logo is referenced from its hosted URL.
+    With client_side=True the cards are embedded as JSON and rendered in the browser
+    by the inlined flashcards.js.
+    """
+    cards = [{"topic": c["topic"], "question": c["question"], "answer": c["answer"]} for c in cards]
+    return render_template("flashcards.html", cards=cards, client_side=client_side, assets=export_assets())
+
+def render_flashcards_pdf(pdf, cards):
+    """Writes flashcards into the PDF, starting a chapter whenever the topic changes."""
+    current_topic = None
+    for card in cards:
+        if card["topic"] and card["topic"] != current_topic:
+            pdf.chapter_title(card["topic"])
+        current_topic = card["topic"]
+        pdf.set_font('', 'B')
+        safe_multicell(pdf, f"Q: {card['question']}")
+        pdf.ln(2)
+        pdf.set_font('', '')
+        safe_multicell(pdf, f"A: {card['answer']}")
+        pdf.ln(2)
+
 # --- Flask Routes ---
 @app.route("/signup", methods=["POST"])
 # def signup():
@@ -206,7 +328,7 @@ def login():
         session.permanent = data.get("remember_me", False)
         if session.permanent:
             app.permanent_session_lifetime = timedelta(hours=24)
-        session["current_conversation_id"] = get_or_create_default_conversation(uid)
+        session["current_conversation_id"] = get_current_conversation(uid)
         return jsonify({"success": True, "message": "Login successful!"})
     return jsonify({"success": False, "message": "Invalid credentials."})
 
@@ -227,22 +349,16 @@ def new_conversation():
         return jsonify({"success": False, "response": "Please log in first."}), 401
     
     user_id = session["user_id"]
-    db = get_db()
-    
-    timestamp_str = datetime.now().strftime('%Y-%m-%d %H:%M')
-    new_title = f"New Chat {timestamp_str}"
-
-    cursor = db.execute("INSERT INTO conversations (user_id, title) VALUES (?, ?)", (user_id, new_title))
-    new_conv_id = cursor.lastrowid
-    db.commit() 
-    
-    # --- ADD THIS LINE ---
-    time.sleep(0.05) # Add a small delay (e.g., 50 milliseconds)
-    # ---------------------
-    
-    session["current_conversation_id"] = new_conv_id
-    print(f"Backend /new_conversation: Created new conversation with ID {new_conv_id}")
-    return jsonify({"success": True, "conversation_id": new_conv_id})
+    # Nothing is inserted until the first message is sent, so abandoned "New Chat" clicks leave no rows behind
+    session["current_conversation_id"] = None
+    print("Backend /new_conversation: Started a new (not yet saved) conversation")
+    # Return the new conversation and the refreshed sidebar so the UI doesn't need a follow-up read
+    return jsonify({
+        "success": True,
+        "conversation_id": None,
+        "conversation": {"id": None, "title": "New Chat"},  # same shape as before; the row is created on the first message
+        "conversations": list_conversations(user_id),
+    })
 
 @app.route("/get_current_chat_history", methods=["GET"])
 def get_current_chat_history():
@@ -250,10 +366,13 @@ def get_current_chat_history():
         return jsonify({"success": False, "history": []})
 
     user_id = session["user_id"]
-    conv_id = get_or_create_default_conversation(user_id)
+    conv_id = get_current_conversation(user_id)
     session["current_conversation_id"] = conv_id
+    if conv_id is None:
+        return jsonify({"success": True, "history": [], "current_conversation_id": None})
     
     db = get_db()
+    ensure_hot(db, conv_id)
     messages = db.execute("SELECT message, response, timestamp FROM messages WHERE conversation_id = ? ORDER BY timestamp ASC",
                           (conv_id,)).fetchall()
     history = [[m["message"], m["response"]] for m in messages]
@@ -261,102 +380,49 @@ def get_current_chat_history():
 
 @app.route('/summarize_chat', methods=['POST'])
 def summarize_chat():
+    """
+    Builds a summary export (PDF or HTML) of the posted history. By default the file
+    is written to the temp directory and fetched later through /files. With
+    "stream": true it is sent in this response and deleted once sent. Streaming only
+    saves the temp file and the second request, not memory: fpdf2 still builds the
+    whole PDF in memory before the first byte goes out. That is bounded by the
+    summary's length, which the model's output limit caps.
+    """
     if "user_id" not in session:
         return jsonify({"success": False, "message": "User not logged in"}), 401
     
     data = request.json
     conversation_history = data.get('history', [])
     
-    messages_for_groq = []
-    for h_msg in conversation_history:
-        messages_for_groq.append({"role": "user", "content": h_msg["message"]})
-        messages_for_groq.append({"role": "assistant", "content": h_msg["response"]})
-
-    summarize_prompt = (
-        "You are an academic tutor and curriculum writer tasked with generating a detailed, structured learning report from the following conversation. "
-        "Your objective is to extract all educational content, group it by topic, and provide an in-depth explanation of each topic as if teaching it to a student. "
-        "Do not summarize the conversation or reference specific dialogue. Instead, reconstruct the content into a clear, well-organized report that fully explains each subject discussed. "
-        "Include additional context, definitions, and examples where needed. Fill in any gaps where a concept was mentioned but not thoroughly explained. "
-        "If practical examples, case studies, **code**, logic, syntax, functions, methods, pseudocode, scenarios, or analogies were discussed in the conversation, include them in the relevant sections. "
-        "If such examples were not provided, **GENERATE appropriate examples**, illustrations, or simplified explanations to help reinforce understanding. These can be from real-world situations, sample problems, or thought experiments. "
-        "Where helpful, include memory techniques, mnemonics, diagrams (as descriptions), or analogies to enhance understanding and retention.\n\n"
-        
-        "For formatting: "
-        "Use plain text only, EXCEPT for the subheadings (Explanation, Examples / Applications, Tips / Mnemonics) which MUST be bolded as shown in the structure below. Do not use other markdown like asterisks (*), backticks (`), or other symbols for emphasis. "
-        "For lists, use numbered bullets like '1.', '2.', '3.' instead of asterisks or dashes. "
-        "Ignore small talk, greetings, or tool usage unless directly relevant to the learning content.\n\n"
-        
-        "Important: Structure the report, exactly as below, and ensure EVERY topic (including any introductory sections) contains ALL three subsections. If content is not directly available from the conversation for 'Examples / Applications' or 'Tips / Mnemonics', you MUST generate relevant content for those sections:\n\n"
-        "=== [Topic Title] ===\n"
-        "**Explanation:**\nFull teaching-style explanation here.\n\n"
-        "**Examples / Applications:**\nReal-world or code examples (if relevant). If no direct examples from the conversation, generate new ones.\n\n"
-        "**Tips / Mnemonics:**\nUseful memory aids or tricks. If no direct tips/mnemonics from the conversation, generate new ones.\n\n"
-        "Conversation:\n" +
-        "\n".join([f"{msg['role']}: {msg['content']}" for msg in messages_for_groq])
-    )
-    messages_for_groq.append({"role": "user", "content": summarize_prompt})
+    messages_for_groq = build_export_messages("summary", conversation_history)
     
-    summary_text = ask_groq(messages_for_groq)
-    summary_text = re.sub(r'\*\*(.*?)\*\*', r'\1', summary_text)  # strip **bold**
-    summary_text = re.sub(r'\_(.*?)\_', r'\1', summary_text)      # strip _italic_
-    summary_text = re.sub(r'\`(.*?)\`', r'\1', summary_text)      # strip `code`
-    summary_text = re.sub(r'^\s+', '', summary_text, flags=re.MULTILINE)  # strip leading spaces on all lines
-    print(f"Generated summary:\n{summary_text}")  
+    summary_text = llm_scheduler.run("bulk", session["user_id"], ask_groq, messages_for_groq, task="summary")
+    print(f"Generated summary:\n{summary_text}")
+    summary_doc = parse_summary(summary_text)
+    del summary_text  # only the parsed model is needed from here on
+    file_format = data.get("format", "pdf")
 
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp:
-            pdf = CustomPDF()
-            pdf.add_page()
-            section_pattern = re.compile(r"(Explanation|Examples / Applications|Tips / Mnemonics)[:：]?\s*(.*)", re.IGNORECASE)
-            last_section = None
-            seen_lines = set()
-
-            for line in summary_text.split('\n'):
-                line = line.strip()
-                if not line or line in seen_lines:
-                    continue
-
-                seen_lines.add(line)
-
-                # === Section titles ===
-                if line.startswith("=== ") and line.endswith(" ==="):
-                    pdf.ensure_space(20)
-                    pdf.chapter_title(line.replace("===", "").strip())
-                    pdf.ln(4)
-                    continue
-
-                # === Sub-section labels like Explanation: ===
-                match = section_pattern.match(line)
-                if match:
-                    label = match.group(1).strip()
-                    content = match.group(2).strip()
-
-                    # Avoid double printing label headers
-                    if last_section == label:
-                        continue
-                    last_section = label
-
-                    pdf.ensure_space(15)
-                    pdf.set_font('', 'B')
-                    safe_multicell(pdf, label + ":")
-                    pdf.set_font('', '')
-                    if content:
-                        safe_multicell(pdf, content)
-                    pdf.ln(3)
-                    continue
-
-                # Clean up bad front spacing and asterisks
-                line = re.sub(r'^\*+\s*', '• ', line)
-                line = re.sub(r'\s{2,}', ' ', line)
-
-                pdf.set_font('', '')
-                pdf.ensure_space(10)
-                safe_multicell(pdf, line)
-                pdf.ln(2)
+        if file_format == "html":
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".html", mode="w", encoding="utf-8") as temp:
+                temp.write(render_summary_html(summary_doc))
+                file_path = temp.name
+        else:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp:
+                pdf = CustomPDF()
+                pdf.add_page()
+                render_summary_pdf(pdf, summary_doc)
+                del summary_doc
+                pdf.output(temp.name)
+                del pdf  # free the in-memory document before the file is sent
+                file_path = temp.name
+
+        if data.get("stream"):
+            # Send the export in this response, in chunks, and delete it afterwards.
+            if file_format == "html":
+                return stream_export(file_path, "summary.html", "text/html")
+            return stream_export(file_path, "summary.pdf", "application/pdf")
 
-            pdf.output(temp.name)
-            file_path = temp.name
-        
         delete_file_later(file_path)
         return jsonify({"success": True, "file_path": file_path})
     except Exception as e:
@@ -372,37 +438,27 @@ def generate_flashcards():
     data = request.json
     conversation_history = data.get('history', [])
     file_format = data.get("format", "pdf")
+    user_id = session["user_id"]
 
-    messages_for_groq = []
-    for h_msg in conversation_history:
-        messages_for_groq.append({"role": "user", "content": h_msg["message"]})
-        messages_for_groq.append({"role": "assistant", "content": h_msg["response"]})
+    attempts = []
+
+    def generate(history):
+        attempts.append(len(history))
+        reply = llm_scheduler.run("bulk", user_id, ask_groq, build_export_messages("flashcards", history), task="flashcards")
+        return None if is_error_reply(reply) else reply
 
-    flashcard_prompt = (
-            "You are an instructional designer and subject matter expert. Your task is to generate high-quality educational flashcards from the following conversation. "
-            "Ignore greetings, social chat, and tool-related comments. Focus solely on extracting learning content from the conversation, even if it spans multiple topics. "
-            "Group flashcards by topic, and ensure each card tests important concepts, definitions, processes, or problem-solving methods discussed. "
-            "Where relevant, include flashcards for concepts that were only briefly mentioned or implied but are necessary for complete understanding. "
-            "\n\nFlashcards must include a **mix** of question types depending on the subject and content:\n"
-            "- Conceptual: definitions, distinctions, 'what' and 'why'\n"
-            "- Applied: case studies, real-world examples, diagnosis-based, analysis questions\n"
-            "- Practical: code snippets, pseudo-scenarios, data interpretation, step-by-step problems\n"
-            "- Process-oriented: questions about sequences, protocols, workflows\n"
-            "- Mnemonics & memory hacks: where helpful, embed memory aids or analogies\n"
-            "Use simple yet precise language for both questions and answers. Provide mnemonics, analogies, or real-world examples where they can enhance understanding or retention. "
-            "Use plain text only. Do not use markdown (e.g., no **bold**, *, or backticks). "
-            "For lists, use numbered bullets like '1.', '2.', '3.' instead of asterisks or dashes. "
-            "Do not reference specific user messages — focus on converting the knowledge into effective active recall material.\n\n"
-            "Format the output as follows:\n\n"
-            "=== [Topic Name] ===\n"
-            "Q: ...\n"
-            "A: ... [Answer in no more than 190 characters total. If the full explanation is longer, split it into multiple Q&A pairs to keep each answer within the limit.]\n\n"
-            "Conversation:\n" +
-            "\n".join([f"{msg['role']}: {msg['content']}" for msg in messages_for_groq])
-        )
-    messages_for_groq.append({"role": "user", "content": flashcard_prompt})
-
-    flashcards_text = ask_groq(messages_for_groq)
+    db = get_db()
+    conv_id = session.get("current_conversation_id")
+    cards = []
+    has_deck = False
+    if ownership_cache.owns(db, user_id, conv_id):
+        # Stored cards are reused; only turns added since the last deck go to the LLM
+        ensure_hot(db, conv_id)
+        cards = update_conversation_flashcards(db, conv_id, user_id, generate)
+        has_deck = last_covered_message_id(db, conv_id) > 0
+    if not has_deck and not attempts and conversation_history:
+        # Nothing stored to build from yet (no saved conversation, or its turns aren't written yet)
+        cards = parse_flashcards(generate(conversation_history) or "")
     
     file_path = None
     try:
@@ -410,19 +466,14 @@ def generate_flashcards():
             with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp:
                 pdf = CustomPDF()
                 pdf.add_page()
-                for line in flashcards_text.split('\n'):
-                    if line.startswith("=== ") and line.endswith(" ==="):
-                        pdf.chapter_title(line.replace("===", "").strip())
-                    elif line.startswith("Q:") or line.startswith("A:"):
-                        pdf.set_font('', 'B' if line.startswith("Q:") else '')
-                        safe_multicell(pdf, line)
-                        pdf.ln(2)
+                render_flashcards_pdf(pdf, cards)
                 pdf.output(temp.name)
                 file_path = temp.name
         
         elif file_format.lower() in ["html", "html (interactive)"]:
              with tempfile.NamedTemporaryFile(delete=False, suffix=".html", mode="w", encoding="utf-8") as temp:
-                html_content = generate_flashcards_html(flashcards_text)
+                # The interactive export ships card data as JSON and renders it in the browser
+                html_content = generate_flashcards_html(cards, client_side=file_format.lower() == "html (interactive)")
                 temp.write(html_content)
                 file_path = temp.name
         
@@ -437,6 +488,34 @@ def generate_flashcards():
         return jsonify({"success": False, "message": f"Error creating flashcard file: {e}"}), 500
 
 
+@app.route("/review/next", methods=["GET"])
+def review_next():
+    if "user_id" not in session:
+        return jsonify({"success": False, "message": "User not logged in"}), 401
+    card = next_due_card(get_db(), session["user_id"])
+    return jsonify({"success": True, "card": card})
+
+@app.route("/review/answer", methods=["POST"])
+def review_answer():
+    if "user_id" not in session:
+        return jsonify({"success": False, "message": "User not logged in"}), 401
+
+    data = request.json
+    try:
+        card_id = int(data.get("card_id"))
+        quality = int(data.get("quality"))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "card_id and quality are required."}), 400
+    if not 0 <= quality <= 5:
+        return jsonify({"success": False, "message": "quality must be between 0 and 5."}), 400
+
+    db = get_db()
+    if not record_review(db, session["user_id"], card_id, quality):
+        return jsonify({"success": False, "message": "Card not found."}), 404
+    # Return the next card straight away so the UI doesn't need another request
+    return jsonify({"success": True, "card": next_due_card(db, session["user_id"])})
+
+
 @app.route('/files/<path:filename>')
 def download_file(filename):
     # Serve files from the system's temporary directory.
@@ -473,30 +552,14 @@ def get_conversations():
     
     user_id = session["user_id"]
     print(f"Backend /get_conversations: User ID from session: {user_id}")
-    db = get_db()
-    convs = db.execute(
-        """
-        SELECT c.id, c.title, (SELECT message FROM messages WHERE conversation_id = c.id ORDER BY timestamp ASC LIMIT 1) as preview
-        FROM conversations c
-        WHERE c.user_id = ? AND (SELECT COUNT(*) FROM messages WHERE conversation_id = c.id) > 0
-        ORDER BY (SELECT MAX(timestamp) FROM messages WHERE conversation_id = c.id) DESC
-        """, (user_id,)
-    ).fetchall()
-    
-    # Modify this line to use c["title"] for the primary display
-    conv_list = []
-    for c in convs:
-        display_title = c["title"] # Use the conversation's title
-        if c["preview"] and c["preview"] != display_title: # If preview is different, append it
-            display_title = f"{display_title} - {c['preview'][:30]}..." if len(c['preview']) > 30 else f"{display_title} - {c['preview']}"
-        conv_list.append({"id": c["id"], "title": display_title})
+    conv_list = list_conversations(user_id)
         
     print(f"Backend /get_conversations: Conversations fetched from DB: {conv_list}")
     return jsonify({"success": True, "conversations": conv_list})
 
 # Also, ensure your schema.sql creates a 'title' column in the conversations table,
 # and that new conversations are given a unique title:
-# In APPX.py, in get_or_create_default_conversation and new_conversation functions:
+# In APPX.py, in create_conversation:
 # Make sure 'title' is being inserted. It already is, so this is just a reminder.
 # Example: (user_id, f"Chat {datetime.now().strftime('%Y-%m-%d %H:%M')}")
 
@@ -508,17 +571,32 @@ def load_conversation(conversation_id):
 
     user_id = session["user_id"]
     db = get_db()
-    conv = db.execute("SELECT id FROM conversations WHERE id = ? AND user_id = ?",
-                      (conversation_id, user_id)).fetchone()
-    if not conv:
+    if not ownership_cache.owns(db, user_id, conversation_id):
         return jsonify({"success": False, "message": "Conversation not found."}), 404
 
     session["current_conversation_id"] = conversation_id
+    ensure_hot(db, conversation_id)
     messages = db.execute("SELECT message, response FROM messages WHERE conversation_id = ? ORDER BY timestamp ASC",
                           (conversation_id,)).fetchall()
     history = [[m["message"], m["response"]] for m in messages]
     return jsonify({"success": True, "history": history, "conversation_id": conversation_id})
 
+def stats_allowed():
+    """/stats is for operators: localhost only, or any client sending STATS_TOKEN as X-Stats-Token."""
+    if STATS_TOKEN:
+        return hmac.compare_digest(request.headers.get("X-Stats-Token", ""), STATS_TOKEN)
+    return request.remote_addr in ("127.0.0.1", "::1")
+
+@app.route("/stats", methods=["GET"])
+def stats():
+    if not stats_allowed():
+        return jsonify({"success": False, "message": "Forbidden"}), 403
+    return jsonify({
+        "response_cache": response_cache.stats() if response_cache else {"enabled": False},
+        "models": model_stats(),
+        "llm_queue": llm_scheduler.stats(),
+    })
+
 @app.route("/chat", methods=["POST"])
 def chat():
     if "user_id" not in session:
@@ -530,24 +608,36 @@ def chat():
     if not user_msg:
         return jsonify({"success": False, "response": "Empty message."}), 400
 
-    conv_id = get_or_create_default_conversation(user_id)
-    session["current_conversation_id"] = conv_id
+    conv_id = get_current_conversation(user_id)
     
     db = get_db()
-    historical_msgs = db.execute("SELECT message, response FROM messages WHERE conversation_id = ? ORDER BY timestamp ASC",
-                                 (conv_id,)).fetchall()
+    historical_msgs = []
+    if conv_id:
+        ensure_hot(db, conv_id)
+        historical_msgs = db.execute("SELECT message, response FROM messages WHERE conversation_id = ? ORDER BY timestamp ASC",
+                                     (conv_id,)).fetchall()
     
     messages_for_groq = []
     for h_msg in historical_msgs:
         messages_for_groq.append({"role": "user", "content": h_msg["message"]})
         messages_for_groq.append({"role": "assistant", "content": h_msg["response"]})
     messages_for_groq.append({"role": "user", "content": user_msg})
-    
-    reply = ask_groq(messages_for_groq)
 
-    db.execute("INSERT INTO messages (conversation_id, user_id, message, response) VALUES (?, ?, ?, ?)",
-               (conv_id, user_id, user_msg, reply))
-    db.commit()
+    # Opening questions of new conversations are often identical across users
+    model = select_model("chat", messages_for_groq)
+    first_turn = response_cache is not None and not historical_msgs
+    reply = response_cache.get(user_msg, model) if first_turn else None
+    if reply is None:
+        reply = llm_scheduler.run("interactive", user_id, ask_groq, messages_for_groq, task="chat", model=model)
+        if first_turn and not is_error_reply(reply):
+            response_cache.put(user_msg, model, reply)
+
+    if conv_id is None:
+        conv_id = create_conversation(user_id)  # first message: the conversation is saved now
+    session["current_conversation_id"] = conv_id
+
+    # Group-committed by the background writer (see write_behind.py for durability modes)
+    message_writer.write(conv_id, user_id, user_msg, reply)
 
     return jsonify({"success": True, "response": reply})
 
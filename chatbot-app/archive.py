@@ -0,0 +1,144 @@
+import json
+import os
+import time
+import zlib
+
+try:
+    import zstandard  # optional: better ratio and faster than zlib
+except ImportError:
+    zstandard = None
+
+# --- Conversation Archive ---
+# Conversations with no activity for N days have their messages packed into a
+# single compressed row in conversation_archives and removed from `messages`,
+# so the hot table (and its indexes) stay small enough to live in the page
+# cache. The first read of an archived conversation moves it back.
+#
+# Message ids are kept in the payload and restored as-is (messages.id is
+# AUTOINCREMENT, so they are never reused), which keeps flashcard decks'
+# last_message_id valid across an archive/restore round trip.
+
+ARCHIVE_CODEC = os.getenv("ARCHIVE_CODEC", "zstd" if zstandard else "zlib")
+ARCHIVE_LEVEL = int(os.getenv("ARCHIVE_LEVEL", "9"))
+
+
+def compress(data, codec=ARCHIVE_CODEC):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("ARCHIVE_CODEC=zstd needs the 'zstandard' package.")
+        return zstandard.ZstdCompressor(level=ARCHIVE_LEVEL).compress(data)
+    if codec == "zlib":
+        return zlib.compress(data, ARCHIVE_LEVEL)
+    raise ValueError(f"Unknown archive codec: {codec}")
+
+
+def decompress(payload, codec):
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This conversation was archived with zstd; install the 'zstandard' package to read it.")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if codec == "zlib":
+        return zlib.decompress(payload)
+    raise ValueError(f"Unknown archive codec: {codec}")
+
+
+def archive_conversation(conn, conversation_id, user_id):
+    """Moves one conversation's messages into the archive. Returns (message_count, raw_size, stored_size)."""
+    rows = conn.execute("SELECT id, user_id, message, response, timestamp FROM messages WHERE conversation_id = ? ORDER BY id",
+                        (conversation_id,)).fetchall()
+    if not rows:
+        return 0, 0, 0
+    # Merge with an earlier archive of the same conversation if a restore was interrupted
+    existing = conn.execute("SELECT codec, payload FROM conversation_archives WHERE conversation_id = ?",
+                            (conversation_id,)).fetchone()
+    if existing:
+        old_rows = json.loads(decompress(existing[1], existing[0]))
+        known_ids = {r[0] for r in rows}
+        rows = sorted([r for r in old_rows if r[0] not in known_ids] + [list(r) for r in rows], key=lambda r: r[0])
+
+    raw = json.dumps([list(r) for r in rows], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    payload = compress(raw)
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO conversation_archives
+            (conversation_id, user_id, codec, payload, raw_size, message_count, preview, last_message_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (conversation_id, user_id, ARCHIVE_CODEC, payload, len(raw), len(rows), rows[0][2], rows[-1][4])
+    )
+    conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+    return len(rows), len(raw), len(payload)
+
+
+def archive_idle_conversations(conn, days):
+    """
+    Archives every conversation whose newest message is older than `days` days.
+    Each conversation is moved in its own short transaction so the app is never
+    blocked for long. Returns {"conversations", "messages", "raw_bytes", "stored_bytes"}.
+    """
+    cutoff = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(time.time() - days * 86400))  # same format as CURRENT_TIMESTAMP
+    idle = conn.execute(
+        """
+        SELECT conversation_id, MAX(user_id) FROM messages
+        GROUP BY conversation_id HAVING MAX(timestamp) < ?
+        """, (cutoff,)
+    ).fetchall()
+
+    totals = {"conversations": 0, "messages": 0, "raw_bytes": 0, "stored_bytes": 0}
+    for conversation_id, user_id in idle:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-check under the write lock: a message may have arrived since the scan
+            last = conn.execute("SELECT MAX(timestamp) FROM messages WHERE conversation_id = ?", (conversation_id,)).fetchone()[0]
+            if last is None or last >= cutoff:
+                conn.rollback()
+                continue
+            count, raw_size, stored_size = archive_conversation(conn, conversation_id, user_id)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        totals["conversations"] += 1
+        totals["messages"] += count
+        totals["raw_bytes"] += raw_size
+        totals["stored_bytes"] += stored_size
+    return totals
+
+
+def restore_conversation(db, conversation_id):
+    """
+    Moves an archived conversation back into `messages`. Returns True if it was
+    archived. Safe to race with another worker restoring the same conversation.
+    """
+    row = db.execute("SELECT codec, payload FROM conversation_archives WHERE conversation_id = ?",
+                     (conversation_id,)).fetchone()
+    if row is None:
+        return False
+    rows = json.loads(decompress(row[1], row[0]))
+    db.executemany(
+        "INSERT OR IGNORE INTO messages (id, conversation_id, user_id, message, response, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+        [(r[0], conversation_id, r[1], r[2], r[3], r[4]) for r in rows]
+    )
+    db.execute("DELETE FROM conversation_archives WHERE conversation_id = ?", (conversation_id,))
+    db.commit()
+    print(f"📦 Restored archived conversation {conversation_id} ({len(rows)} messages)")
+    return True
+
+
+def archive_report(conn):
+    """Sizes of the hot and archived tiers, for `python maintenance.py report`."""
+    hot_conversations, hot_messages, hot_bytes = conn.execute(
+        "SELECT COUNT(DISTINCT conversation_id), COUNT(*), COALESCE(SUM(LENGTH(message) + LENGTH(response)), 0) FROM messages"
+    ).fetchone()
+    archived_conversations, archived_messages, raw_bytes, stored_bytes = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(message_count), 0), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(payload)), 0) FROM conversation_archives"
+    ).fetchone()
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return {
+        "hot": {"conversations": hot_conversations, "messages": hot_messages, "text_bytes": hot_bytes},
+        "archived": {"conversations": archived_conversations, "messages": archived_messages,
+                     "raw_bytes": raw_bytes, "stored_bytes": stored_bytes,
+                     "ratio": round(raw_bytes / stored_bytes, 2) if stored_bytes else None},
+        "file": {"bytes": page_size * page_count, "free_bytes": page_size * free_pages},
+    }
@@ -0,0 +1,41 @@
+// Renders exported flashcards from the JSON embedded in the page (client-side mode).
+(function () {
+    var data = document.getElementById("flashcard-data");
+    var grid = document.getElementById("flashcards-grid");
+    if (!data || !grid) {
+        return;
+    }
+
+    function el(tag, className, text) {
+        var node = document.createElement(tag);
+        node.className = className;
+        if (text !== undefined) {
+            node.textContent = text;
+        }
+        return node;
+    }
+
+    var fragment = document.createDocumentFragment();
+    JSON.parse(data.textContent).forEach(function (card) {
+        var container = el("div", "flashcard-container");
+        var flashcard = el("div", "flashcard");
+        var front = el("div", "flashcard-front");
+        var back = el("div", "flashcard-back");
+        front.appendChild(el("p", "card-question", card.question));
+        back.appendChild(el("p", "card-answer", card.answer));
+        flashcard.appendChild(front);
+        flashcard.appendChild(back);
+        container.appendChild(flashcard);
+        container.appendChild(el("div", "flashcard-topic", card.topic));
+        fragment.appendChild(container);
+    });
+    grid.appendChild(fragment);
+
+    // One listener for every card instead of an inline handler per card
+    grid.addEventListener("click", function (event) {
+        var card = event.target.closest(".flashcard");
+        if (card) {
+            card.classList.toggle("flipped");
+        }
+    });
+})();
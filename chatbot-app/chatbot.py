@@ -1,27 +1,134 @@
 import requests
 import time
 import os
+import json
+import threading
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_ENDPOINT = "https://api.groq.com/openai/v1/chat/completions"
 
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+
 MAX_RETRIES = 3
+REQUEST_TIMEOUT = 30  # seconds
+
+# --- Model Routing ---
+# Each task lists (max_input_tokens, model) tiers; the first tier the input
+# fits in is used (None = no limit). Quick chat turns go to the small model so
+# they don't share the heavy model's quota with bulk exports.
+MODEL_ROUTES = {
+    "chat": [(2000, "llama-3.1-8b-instant"), (None, DEFAULT_MODEL)],
+    "summary": [(None, DEFAULT_MODEL)],
+    "flashcards": [(None, DEFAULT_MODEL)],
+}
+# Model to switch to when a model is rate limited (429) or times out, per task.
+# Groq rate limits are per model, so bulk exports fall back to their own model
+# instead of the 8b-instant one chat uses, and never eat into chat's quota.
+BULK_FALLBACK_MODEL = os.getenv("BULK_FALLBACK_MODEL", "meta-llama/llama-4-scout-17b-16e-instruct")
+FALLBACK_MODELS = {
+    "chat": {DEFAULT_MODEL: "llama-3.1-8b-instant"},
+    "summary": {DEFAULT_MODEL: BULK_FALLBACK_MODEL},
+    "flashcards": {DEFAULT_MODEL: BULK_FALLBACK_MODEL},
+}
+# If a model's recent average latency exceeds the task's budget, start on its fallback instead
+LATENCY_BUDGETS = {
+    "chat": 8.0,  # seconds
+}
+LATENCY_WINDOW = 120  # seconds; older latency samples are ignored so a slow model gets retried
+LATENCY_SMOOTHING = 0.3
+
+# Optional JSON file overriding any of the above, e.g.
+# {"routes": {"chat": [[2000, "llama-3.1-8b-instant"], [null, "llama-3.3-70b-versatile"]]},
+#  "fallbacks": {"summary": {"llama-3.3-70b-versatile": "..."}}, "latency_budgets": {...}}
+MODEL_CONFIG = os.getenv("MODEL_CONFIG")
+if MODEL_CONFIG and os.path.exists(MODEL_CONFIG):
+    with open(MODEL_CONFIG, "r") as f:
+        _config = json.load(f)
+    MODEL_ROUTES.update({task: [tuple(tier) for tier in tiers] for task, tiers in _config.get("routes", {}).items()})
+    for task, fallbacks in _config.get("fallbacks", {}).items():
+        FALLBACK_MODELS.setdefault(task, {}).update(fallbacks)
+    LATENCY_BUDGETS.update(_config.get("latency_budgets", {}))
+
+_model_stats = {}  # model -> {"latency": ewma seconds, "updated": monotonic time, "calls": n, "fallbacks": n}
+_stats_lock = threading.Lock()
+
+def estimate_tokens(messages_list):
+    """Rough input size (~4 characters per token)."""
+    return sum(len(m["content"]) for m in messages_list) // 4
+
+def record_latency(model, seconds):
+    with _stats_lock:
+        stats = _model_stats.setdefault(model, {"latency": seconds, "updated": 0.0, "calls": 0, "fallbacks": 0})
+        stats["latency"] += LATENCY_SMOOTHING * (seconds - stats["latency"])
+        stats["updated"] = time.monotonic()
+        stats["calls"] += 1
+
+def _record_fallback(model):
+    with _stats_lock:
+        stats = _model_stats.setdefault(model, {"latency": 0.0, "updated": 0.0, "calls": 0, "fallbacks": 0})
+        stats["fallbacks"] += 1
+
+def recent_latency(model):
+    """The model's smoothed latency, or None if there is no recent sample."""
+    stats = _model_stats.get(model)
+    if not stats or time.monotonic() - stats["updated"] > LATENCY_WINDOW:
+        return None
+    return stats["latency"]
+
+def fallback_model(task, model):
+    """The model a task switches to when `model` is rate limited or slow (None if there is none)."""
+    return FALLBACK_MODELS.get(task, FALLBACK_MODELS["chat"]).get(model)
 
-def ask_groq(messages_list):
+def select_model(task, messages_list):
+    """Picks the model for a task based on input size and recent latency."""
+    size = estimate_tokens(messages_list)
+    tiers = MODEL_ROUTES.get(task, MODEL_ROUTES["chat"])
+    model = next((m for limit, m in tiers if limit is None or size <= limit), tiers[-1][1])
+
+    budget = LATENCY_BUDGETS.get(task)
+    latency = recent_latency(model)
+    if budget and latency is not None and latency > budget and fallback_model(task, model):
+        model = fallback_model(task, model)
+    return model
+
+def model_stats():
+    with _stats_lock:
+        return {m: {"latency": round(s["latency"], 3), "calls": s["calls"], "fallbacks": s["fallbacks"]}
+                for m, s in _model_stats.items()}
+
+def is_error_reply(text):
+    """True for the fallback messages ask_groq returns instead of a real answer (or no text at all)."""
+    return not text or text.startswith(("❌", "⚠️"))
+
+def ask_groq(messages_list, task="chat", model=None):
     headers = {
         "Authorization": f"Bearer {GROQ_API_KEY}",
         "Content-Type": "application/json"
     }
-    data = {
-        "model": "llama-3.3-70b-versatile",
-        "messages": messages_list
-    }
+    model = model or select_model(task, messages_list)
+    tried = {model}
 
-    for attempt in range(MAX_RETRIES):
+    # Switching to a fallback model doesn't use up an attempt, so a 429 on the
+    # last attempt still gets one try on the fallback.
+    attempt = 0
+    while attempt < MAX_RETRIES:
+        data = {
+            "model": model,
+            "messages": messages_list
+        }
+        start = time.monotonic()
         try:
-            response = requests.post(GROQ_ENDPOINT, headers=headers, json=data, timeout=30)
+            response = requests.post(GROQ_ENDPOINT, headers=headers, json=data, timeout=REQUEST_TIMEOUT)
 
             if response.status_code == 429:
+                fallback = fallback_model(task, model)
+                if fallback and fallback not in tried:
+                    print(f"🕒 Rate limit hit (429) on {model}. Falling back to {fallback}...")
+                    _record_fallback(model)
+                    model = fallback
+                    tried.add(model)
+                    continue
+
                 retry_after = response.headers.get("Retry-After")
                 if retry_after:
                     try:
@@ -31,14 +138,30 @@ def ask_groq(messages_list):
                 else:
                     wait_time = 2 ** attempt  # fallback if header missing
 
-                print(f"🕒 Rate limit hit (429). Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
+                attempt += 1
+                if attempt < MAX_RETRIES:
+                    print(f"🕒 Rate limit hit (429). Retrying in {wait_time} seconds...")
+                    time.sleep(wait_time)
                 continue
 
             response.raise_for_status()
-            return response.json()['choices'][0]['message']['content']
+            record_latency(model, time.monotonic() - start)
+            content = response.json()['choices'][0]['message']['content']
+            if not content:  # tool-call or filtered responses carry content=None
+                return "⚠️ Received an empty response from AI. Please try again."
+            return content
 
         except requests.exceptions.RequestException as e:
+            if isinstance(e, requests.exceptions.Timeout):
+                record_latency(model, time.monotonic() - start)  # count the timeout so routing adapts
+                fallback = fallback_model(task, model)
+                if fallback and fallback not in tried:
+                    print(f"⏱️ {model} timed out. Falling back to {fallback}...")
+                    _record_fallback(model)
+                    model = fallback
+                    tried.add(model)
+                    continue
+
             if attempt == MAX_RETRIES - 1:
                 print(f"Request failed after {MAX_RETRIES} attempts: {e}")
                 return "❌ Unable to connect to the AI after multiple attempts. Please try again later."
@@ -46,6 +169,7 @@ def ask_groq(messages_list):
                 wait_time = 2 ** attempt
                 print(f"⚠️ Request error. Retrying in {wait_time} seconds...")
                 time.sleep(wait_time)
+                attempt += 1
 
         except KeyError:
             return "⚠️ Received unexpected response from AI. Please try again."
@@ -5,11 +5,14 @@ from flask import g
 DATABASE = "chat.db"
 
 def init_db():
-    if not os.path.exists(DATABASE):
-        with sqlite3.connect(DATABASE) as conn:
-            # Assuming schema.sql exists and is correctly defined
-            with open("schema.sql", "r") as f:
-                conn.executescript(f.read())
+    # Every statement in schema.sql is "IF NOT EXISTS", so running it on an
+    # existing database only adds the tables/indexes it is missing.
+    with sqlite3.connect(DATABASE) as conn:
+        # WAL lets readers keep going while the message writer commits (persists in the file)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Assuming schema.sql exists and is correctly defined
+        with open("schema.sql", "r") as f:
+            conn.executescript(f.read())
 
 def get_db():
     if "db" not in g:
@@ -0,0 +1,72 @@
+import functools
+import os
+
+from parsers import parse_flashcards
+from review import schedule_new_cards
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+# --- Flashcard Storage ---
+# Each generation run is stored as a deck of cards linked to its conversation.
+# A deck remembers the newest message it covered, so regenerating only sends
+# the turns added since then to the LLM.
+
+def last_covered_message_id(db, conversation_id):
+    row = db.execute("SELECT MAX(last_message_id) AS last_id FROM flashcard_decks WHERE conversation_id = ?",
+                     (conversation_id,)).fetchone()
+    return row["last_id"] or 0
+
+def get_conversation_flashcards(db, conversation_id):
+    """Returns every stored card of a conversation, oldest deck first."""
+    rows = db.execute("SELECT id, topic, question, answer FROM flashcards WHERE conversation_id = ? ORDER BY id",
+                      (conversation_id,)).fetchall()
+    return [dict(r) for r in rows]
+
+def save_deck(db, conversation_id, user_id, last_message_id, cards):
+    """Stores a newly generated deck and its cards in one transaction."""
+    cursor = db.execute("INSERT INTO flashcard_decks (conversation_id, user_id, last_message_id) VALUES (?, ?, ?)",
+                        (conversation_id, user_id, last_message_id))
+    deck_id = cursor.lastrowid
+    card_ids = []
+    for c in cards:
+        card_cursor = db.execute("INSERT INTO flashcards (deck_id, conversation_id, topic, question, answer) VALUES (?, ?, ?, ?, ?)",
+                                 (deck_id, conversation_id, c["topic"], c["question"], c["answer"]))
+        card_ids.append(card_cursor.lastrowid)
+    schedule_new_cards(db, user_id, card_ids)
+    db.commit()
+    return deck_id
+
+def update_conversation_flashcards(db, conversation_id, user_id, generate):
+    """
+    Brings a conversation's flashcards up to date and returns all of them.
+    generate(history) must return the raw LLM flashcard text for a list of
+    {'message', 'response'} turns, or None if the LLM call failed; it is only
+    called for turns not yet covered.
+    """
+    last_id = last_covered_message_id(db, conversation_id)
+    new_turns = db.execute("SELECT id, message, response FROM messages WHERE conversation_id = ? AND id > ? ORDER BY id",
+                           (conversation_id, last_id)).fetchall()
+    if new_turns:
+        reply = generate([{"message": t["message"], "response": t["response"]} for t in new_turns])
+        if reply is None:
+            # Failed call: keep the turns uncovered so the next export retries them
+            print(f"⚠️ Flashcard generation failed for conversation {conversation_id}; not saving a deck.")
+        else:
+            # Saved even when no cards were parsed (e.g. small talk), so these turns aren't re-sent on every export
+            save_deck(db, conversation_id, user_id, new_turns[-1]["id"], parse_flashcards(reply))
+    return get_conversation_flashcards(db, conversation_id)
+
+
+# --- HTML Export Assets ---
+# Exported HTML is downloaded and opened from disk, where root-relative /assets
+# links don't resolve, so the CSS and JS (a few KB) are inlined into the page.
+# The logo stays a hosted image: inlining the 239 KB PNG would dwarf the cards.
+EXPORT_LOGO_URL = "https://github.com/MahekTrivedi44/logo/blob/main/logo.png?raw=true"
+
+@functools.lru_cache(maxsize=None)
+def export_assets():
+    """Reads the flashcard CSS/JS once per process."""
+    def read(name):
+        with open(os.path.join(ASSETS_DIR, name)) as f:
+            return f.read()
+    return {"css": read("flashcards.css"), "js": read("flashcards.js"), "logo": EXPORT_LOGO_URL}
@@ -0,0 +1,63 @@
+import argparse
+import json
+import sqlite3
+
+from db import DATABASE
+from ownership import ownership_cache
+from archive import archive_idle_conversations, archive_report
+
+# --- Database Maintenance ---
+# Run from the chatbot-app directory, e.g.:
+#   python maintenance.py compact
+#   python maintenance.py archive --days 30 [--vacuum]
+#   python maintenance.py report
+
+# Conversations are created by /chat just before their first message is queued in
+# the write-behind writer, so a brand-new conversation is briefly empty; compaction
+# leaves anything younger than this alone.
+MIN_EMPTY_AGE_MINUTES = 10
+
+def compact_empty_conversations(conn, min_age_minutes=MIN_EMPTY_AGE_MINUTES):
+    """Deletes conversations that never received a message. Returns how many were removed."""
+    cursor = conn.execute(
+        """
+        DELETE FROM conversations
+        WHERE timestamp < datetime('now', ?)
+          AND NOT EXISTS (SELECT 1 FROM messages WHERE messages.conversation_id = conversations.id)
+          AND NOT EXISTS (SELECT 1 FROM conversation_archives WHERE conversation_archives.conversation_id = conversations.id)
+        """, (f"-{int(min_age_minutes)} minutes",)
+    )
+    conn.commit()
+    if cursor.rowcount:
+        ownership_cache.invalidate()  # running workers drop their cached ownership
+    return cursor.rowcount
+
+def main():
+    parser = argparse.ArgumentParser(description="Query Quokka database maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compact_parser = subparsers.add_parser("compact", help="Remove conversations that have no messages")
+    compact_parser.add_argument("--min-age-minutes", type=int, default=MIN_EMPTY_AGE_MINUTES,
+                                help=f"Only remove conversations created at least this long ago (default: {MIN_EMPTY_AGE_MINUTES})")
+    archive_parser = subparsers.add_parser("archive", help="Move conversations idle for N days to compressed storage")
+    archive_parser.add_argument("--days", type=int, default=30, help="Idle days before a conversation is archived (default: 30)")
+    archive_parser.add_argument("--vacuum", action="store_true", help="Rebuild the database file afterwards to return freed space to the OS")
+    subparsers.add_parser("report", help="Show the size of the hot and archived tiers")
+    args = parser.parse_args()
+
+    # isolation_level=None: archive_idle_conversations manages its own transactions
+    with sqlite3.connect(DATABASE, isolation_level=None) as conn:
+        if args.command == "compact":
+            removed = compact_empty_conversations(conn, args.min_age_minutes)
+            print(f"🧹 Removed {removed} empty conversations.")
+        elif args.command == "archive":
+            totals = archive_idle_conversations(conn, args.days)
+            print(f"📦 Archived {totals['conversations']} conversations ({totals['messages']} messages): "
+                  f"{totals['raw_bytes'] / 1024:.1f} KB -> {totals['stored_bytes'] / 1024:.1f} KB")
+            if args.vacuum and totals["conversations"]:
+                conn.execute("VACUUM")
+                print("🧹 Database file vacuumed.")
+        elif args.command == "report":
+            print(json.dumps(archive_report(conn), indent=2))
+
+if __name__ == "__main__":
+    main()
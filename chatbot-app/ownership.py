@@ -0,0 +1,65 @@
+import os
+import threading
+
+# --- Conversation Ownership Cache ---
+# Remembers which conversation ids each user owns so the hot path
+# (/chat, /get_current_chat_history, /login) doesn't re-query `conversations`
+# every request. Only positive answers are cached: a conversation created by
+# another worker is simply a miss that falls through to the database.
+# Deletions must reach every worker, so they bump an epoch file; each lookup
+# stat()s it (no database query) and drops the whole cache when it changed.
+OWNERSHIP_EPOCH_FILE = os.getenv("OWNERSHIP_EPOCH_FILE", "conversations.epoch")
+
+
+class OwnershipCache:
+    def __init__(self, epoch_path=OWNERSHIP_EPOCH_FILE):
+        self.epoch_path = epoch_path
+        self._owned = {}  # user_id -> set of conversation ids
+        self._lock = threading.Lock()
+        self._epoch = self._read_epoch()
+
+    def _read_epoch(self):
+        try:
+            st = os.stat(self.epoch_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns)
+
+    def _sync_epoch(self):
+        epoch = self._read_epoch()
+        if epoch != self._epoch:
+            with self._lock:
+                self._owned.clear()
+                self._epoch = epoch
+
+    def owns(self, db, user_id, conversation_id):
+        """True if the user owns the conversation; queries the database only on a cache miss."""
+        if not conversation_id:
+            return False
+        self._sync_epoch()
+        if conversation_id in self._owned.get(user_id, ()):
+            return True
+        row = db.execute("SELECT id FROM conversations WHERE id = ? AND user_id = ?",
+                         (conversation_id, user_id)).fetchone()
+        if row:
+            self.add(user_id, conversation_id)
+        return row is not None
+
+    def add(self, user_id, conversation_id):
+        """Records a conversation the user has just created (or was verified to own)."""
+        with self._lock:
+            self._owned.setdefault(user_id, set()).add(conversation_id)
+
+    def invalidate(self):
+        """Call after deleting conversations: clears this process and tells every other worker."""
+        with self._lock:
+            self._owned.clear()
+        # Replace the file rather than touching it so the inode changes even on coarse-mtime filesystems
+        tmp_path = f"{self.epoch_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(str(os.getpid()))
+        os.replace(tmp_path, self.epoch_path)
+        self._epoch = self._read_epoch()
+
+
+ownership_cache = OwnershipCache()
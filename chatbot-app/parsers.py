@@ -0,0 +1,152 @@
+import re
+
+# --- LLM Output Parsing ---
+# The summary text is tokenized once into a small document model that both the
+# PDF and HTML renderers walk:
+#
+#   [{"title": "Topic" or None,
+#     "sections": [{"label": "Explanation" or None, "lines": ["...", "• ..."]}]}]
+
+SECTION_PATTERN = re.compile(r"(Explanation|Examples / Applications|Tips / Mnemonics)[:：]?\s*(.*)", re.IGNORECASE)
+# **bold**, _italic_ and `code` stripped in one pass
+INLINE_MARKUP = re.compile(r"\*\*(.*?)\*\*|_(.*?)_|`(.*?)`")
+
+
+def _strip_markup(match):
+    return match.group(match.lastindex) or ""
+
+
+def _new_topic(title=None):
+    return {"title": title, "sections": [{"label": None, "lines": []}]}
+
+
+def parse_summary(summary_text):
+    """Parses the LLM learning report into a list of topics in a single pass over the text."""
+    topics = [_new_topic()]
+    seen_lines = set()
+    last_label = None
+
+    for line in summary_text.split("\n"):
+        if "*" in line or "_" in line or "`" in line:
+            line = INLINE_MARKUP.sub(_strip_markup, line)
+        line = line.strip()
+        if not line:
+            continue
+
+        # === Topic titles ===
+        if line.startswith("=== ") and line.endswith(" ==="):
+            topics.append(_new_topic(line.replace("===", "").strip()))
+            last_label = None
+            continue
+
+        # === Sub-section labels like Explanation: ===
+        match = SECTION_PATTERN.match(line) if line[0] in "EeTt" else None
+        if match:
+            label = match.group(1).strip()
+            content = match.group(2).strip()
+            if label != last_label:  # avoid double printing label headers
+                topics[-1]["sections"].append({"label": label, "lines": []})
+                last_label = label
+            if content and content not in seen_lines:
+                seen_lines.add(content)
+                topics[-1]["sections"][-1]["lines"].append(content)
+            continue
+
+        if line in seen_lines:
+            continue
+        seen_lines.add(line)
+
+        # Clean up bad front spacing and asterisks
+        if line[0] == "*":
+            line = "• " + line.lstrip("*").lstrip()
+        if "  " in line or "\t" in line:
+            line = " ".join(line.split())
+        topics[-1]["sections"][-1]["lines"].append(line)
+
+    # Drop the empty leading placeholders (text before the first topic/section is rare)
+    for topic in topics:
+        topic["sections"] = [s for s in topic["sections"] if s["label"] or s["lines"]]
+    return [t for t in topics if t["title"] or t["sections"]]
+
+
+def parse_flashcards(flashcards_text):
+    """Parses '=== Topic ===' / 'Q:' / 'A:' flashcard output into a list of {topic, question, answer} dicts."""
+    cards = []
+    current_topic = ""
+    current_question = None
+
+    for line in flashcards_text.split("\n"):
+        line = line.strip()
+        if line.startswith("=== ") and line.endswith(" ==="):
+            current_topic = line.replace("===", "").strip()
+            continue
+        prefix = line[:2].upper()
+        if prefix == "Q:":
+            current_question = line[2:].strip()
+        elif prefix == "A:" and current_question is not None:
+            cards.append({"topic": current_topic, "question": current_question, "answer": line[2:].strip()})
+            current_question = None
+    return cards
+
+
+# --- Micro-benchmark ---
+def _legacy_parse(summary_text):
+    """The previous regex cascade, kept only for benchmarking against parse_summary."""
+    summary_text = re.sub(r'\*\*(.*?)\*\*', r'\1', summary_text)
+    summary_text = re.sub(r'\_(.*?)\_', r'\1', summary_text)
+    summary_text = re.sub(r'\`(.*?)\`', r'\1', summary_text)
+    summary_text = re.sub(r'^\s+', '', summary_text, flags=re.MULTILINE)
+    section_pattern = re.compile(r"(Explanation|Examples / Applications|Tips / Mnemonics)[:：]?\s*(.*)", re.IGNORECASE)
+    out = []
+    seen_lines = set()
+    for line in summary_text.split('\n'):
+        line = line.strip()
+        if not line or line in seen_lines:
+            continue
+        seen_lines.add(line)
+        if line.startswith("=== ") and line.endswith(" ==="):
+            out.append(line)
+            continue
+        if section_pattern.match(line):
+            out.append(line)
+            continue
+        line = re.sub(r'^\*+\s*', '• ', line)
+        line = re.sub(r'\s{2,}', ' ', line)
+        out.append(re.sub(r'[^\x20-\x7E\n\r]', '', line))
+    return out
+
+
+def _sample_summary(target_bytes=100_000):
+    block = (
+        "=== Topic {i} ===\n"
+        "**Explanation:**\n"
+        "Recursion is when a function calls itself on a _smaller_ input until it reaches a base case {i}.\n"
+        "1. Identify the base case.\n"
+        "2. Make progress toward it with `f(n - 1)`.\n\n"
+        "**Examples / Applications:**\n"
+        "* Factorial:   n! = n * (n - 1)! for topic {i}\n"
+        "* Tree traversal visits each node once.\n\n"
+        "**Tips / Mnemonics:**\n"
+        "Think \"trust the recursion\" — solve one step, delegate the rest ({i}).\n\n"
+    )
+    parts = []
+    size = 0
+    i = 0
+    while size < target_bytes:
+        chunk = block.format(i=i)
+        parts.append(chunk)
+        size += len(chunk.encode("utf-8"))
+        i += 1
+    return "".join(parts)
+
+
+if __name__ == "__main__":
+    import timeit
+
+    text = _sample_summary()
+    runs = 20
+    new = timeit.timeit(lambda: parse_summary(text), number=runs) / runs
+    old = timeit.timeit(lambda: _legacy_parse(text), number=runs) / runs
+    print(f"Summary size: {len(text.encode('utf-8')) / 1024:.0f} KB, {len(parse_summary(text))} topics")
+    print(f"regex cascade: {old * 1000:.2f} ms/export")
+    print(f"parse_summary: {new * 1000:.2f} ms/export ({old / new:.1f}x)")
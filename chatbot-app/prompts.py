@@ -0,0 +1,124 @@
+import os
+
+# --- Prompt Assembly ---
+# Export prompts (summary / flashcards) are built here exactly once: the
+# conversation is serialized into the prompt text and NOT sent a second time
+# as separate chat messages.
+
+# Rough token estimate: ~4 characters per token for English text, plus a small
+# per-message overhead for the role/formatting tokens the API adds.
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Upper bound on the input tokens of a single export request.
+MAX_PROMPT_TOKENS = int(os.getenv("MAX_PROMPT_TOKENS", "24000"))
+TRUNCATION_MARKER = "[...earlier part of this message omitted...] "
+
+SUMMARY_TEMPLATE = (
+    "You are an academic tutor and curriculum writer tasked with generating a detailed, structured learning report from the following conversation. "
+    "Your objective is to extract all educational content, group it by topic, and provide an in-depth explanation of each topic as if teaching it to a student. "
+    "Do not summarize the conversation or reference specific dialogue. Instead, reconstruct the content into a clear, well-organized report that fully explains each subject discussed. "
+    "Include additional context, definitions, and examples where needed. Fill in any gaps where a concept was mentioned but not thoroughly explained. "
+    "If practical examples, case studies, **code**, logic, syntax, functions, methods, pseudocode, scenarios, or analogies were discussed in the conversation, include them in the relevant sections. "
+    "If such examples were not provided, **GENERATE appropriate examples**, illustrations, or simplified explanations to help reinforce understanding. These can be from real-world situations, sample problems, or thought experiments. "
+    "Where helpful, include memory techniques, mnemonics, diagrams (as descriptions), or analogies to enhance understanding and retention.\n\n"
+
+    "For formatting: "
+    "Use plain text only, EXCEPT for the subheadings (Explanation, Examples / Applications, Tips / Mnemonics) which MUST be bolded as shown in the structure below. Do not use other markdown like asterisks (*), backticks (`), or other symbols for emphasis. "
+    "For lists, use numbered bullets like '1.', '2.', '3.' instead of asterisks or dashes. "
+    "Ignore small talk, greetings, or tool usage unless directly relevant to the learning content.\n\n"
+
+    "Important: Structure the report, exactly as below, and ensure EVERY topic (including any introductory sections) contains ALL three subsections. If content is not directly available from the conversation for 'Examples / Applications' or 'Tips / Mnemonics', you MUST generate relevant content for those sections:\n\n"
+    "=== [Topic Title] ===\n"
+    "**Explanation:**\nFull teaching-style explanation here.\n\n"
+    "**Examples / Applications:**\nReal-world or code examples (if relevant). If no direct examples from the conversation, generate new ones.\n\n"
+    "**Tips / Mnemonics:**\nUseful memory aids or tricks. If no direct tips/mnemonics from the conversation, generate new ones.\n\n"
+    "Conversation:\n"
+)
+
+FLASHCARD_TEMPLATE = (
+    "You are an instructional designer and subject matter expert. Your task is to generate high-quality educational flashcards from the following conversation. "
+    "Ignore greetings, social chat, and tool-related comments. Focus solely on extracting learning content from the conversation, even if it spans multiple topics. "
+    "Group flashcards by topic, and ensure each card tests important concepts, definitions, processes, or problem-solving methods discussed. "
+    "Where relevant, include flashcards for concepts that were only briefly mentioned or implied but are necessary for complete understanding. "
+    "\n\nFlashcards must include a **mix** of question types depending on the subject and content:\n"
+    "- Conceptual: definitions, distinctions, 'what' and 'why'\n"
+    "- Applied: case studies, real-world examples, diagnosis-based, analysis questions\n"
+    "- Practical: code snippets, pseudo-scenarios, data interpretation, step-by-step problems\n"
+    "- Process-oriented: questions about sequences, protocols, workflows\n"
+    "- Mnemonics & memory hacks: where helpful, embed memory aids or analogies\n"
+    "Use simple yet precise language for both questions and answers. Provide mnemonics, analogies, or real-world examples where they can enhance understanding or retention. "
+    "Use plain text only. Do not use markdown (e.g., no **bold**, *, or backticks). "
+    "For lists, use numbered bullets like '1.', '2.', '3.' instead of asterisks or dashes. "
+    "Do not reference specific user messages — focus on converting the knowledge into effective active recall material.\n\n"
+    "Format the output as follows:\n\n"
+    "=== [Topic Name] ===\n"
+    "Q: ...\n"
+    "A: ... [Answer in no more than 190 characters total. If the full explanation is longer, split it into multiple Q&A pairs to keep each answer within the limit.]\n\n"
+    "Conversation:\n"
+)
+
+TEMPLATES = {
+    "summary": SUMMARY_TEMPLATE,
+    "flashcards": FLASHCARD_TEMPLATE,
+}
+
+
+def count_tokens(text):
+    """Estimates the number of tokens in a piece of text."""
+    if not text:
+        return 0
+    return -(-len(text) // CHARS_PER_TOKEN)  # ceil division
+
+
+def count_message_tokens(messages):
+    """Estimates the input tokens of a list of chat messages."""
+    return sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def _format_turn(turn):
+    return f"user: {turn['message']}\nassistant: {turn['response']}"
+
+
+def _truncate_to_tokens(text, max_tokens):
+    """Keeps the tail of text so it fits in max_tokens (the end of a turn is usually the answer)."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    keep_chars = max(0, max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER))
+    return TRUNCATION_MARKER + text[len(text) - keep_chars:] if keep_chars else ""
+
+
+def build_transcript(history, max_tokens):
+    """
+    Serializes history (a list of {'message', 'response'} dicts) into a transcript
+    of at most max_tokens. Truncation policy: the newest turns are kept and the
+    oldest dropped first; if even the newest turn is too big on its own, it is
+    cut from the front.
+    """
+    kept = []
+    used = 0
+    for turn in reversed(history):
+        text = _format_turn(turn)
+        cost = count_tokens(text) + 1  # +1 for the joining newline
+        if used + cost > max_tokens:
+            if not kept:
+                kept.append(_truncate_to_tokens(text, max_tokens))
+            break
+        kept.append(text)
+        used += cost
+    kept.reverse()
+    return "\n".join(kept)
+
+
+def build_export_messages(kind, history, max_tokens=None):
+    """
+    Builds the message list for a summary/flashcard export. The conversation
+    appears once, inside the prompt, and the whole request is guaranteed to fit
+    in max_tokens (defaults to MAX_PROMPT_TOKENS).
+    """
+    template = TEMPLATES[kind]
+    budget = (max_tokens or MAX_PROMPT_TOKENS) - MESSAGE_OVERHEAD_TOKENS - count_tokens(template)
+    if budget <= 0:
+        raise ValueError(f"Prompt budget too small for the '{kind}' template.")
+    prompt = template + build_transcript(history, budget)
+    return [{"role": "user", "content": prompt}]
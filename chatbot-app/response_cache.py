@@ -0,0 +1,105 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# --- Response Cache for first-turn prompts ---
+# Opt-in (RESPONSE_CACHE_ENABLED=1). Replies to the opening message of a brand
+# new conversation are cached by normalized prompt + model, first in an LRU
+# dict in this process and then in a small SQLite file shared by all workers.
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "0") == "1"
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", str(24 * 60 * 60)))  # seconds
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))  # entries kept in memory
+RESPONSE_CACHE_DB = os.getenv("RESPONSE_CACHE_DB", "response_cache.db")
+PURGE_INTERVAL = 10 * 60  # seconds between sweeps of expired disk rows (done on write)
+
+
+def normalize_prompt(text):
+    """Lowercases, collapses whitespace and drops trailing punctuation so trivial variants share an entry."""
+    return " ".join(text.lower().split()).rstrip("?!. ")
+
+
+class ResponseCache:
+    def __init__(self, path=RESPONSE_CACHE_DB, ttl=RESPONSE_CACHE_TTL, max_entries=RESPONSE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._memory = OrderedDict()  # key -> (expires_at, response)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_expires ON response_cache (expires_at)")
+        self._conn.commit()
+        self._next_purge = 0.0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(prompt, model):
+        return hashlib.sha256(f"{model}\0{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key, expires_at, response):
+        self._memory[key] = (expires_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, prompt, model):
+        key = self.make_key(prompt, model)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[0] > now:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[1]
+            if entry:
+                del self._memory[key]
+
+            row = self._conn.execute("SELECT response, expires_at FROM response_cache WHERE key = ?", (key,)).fetchone()
+            if row and row[1] > now:
+                self._remember(key, row[1], row[0])
+                self.disk_hits += 1
+                return row[0]
+            if row:
+                self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                self._conn.commit()
+            self.misses += 1
+            return None
+
+    def put(self, prompt, model, response):
+        key = self.make_key(prompt, model)
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, response)
+            self._conn.execute("INSERT OR REPLACE INTO response_cache (key, response, expires_at) VALUES (?, ?, ?)",
+                               (key, response, expires_at))
+            if now >= self._next_purge:
+                self._purge_expired(now)
+            self._conn.commit()
+
+    def _purge_expired(self, now):
+        """Deletes expired disk rows (most are never read again, so get() alone wouldn't remove them)."""
+        self._conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+        self._next_purge = now + PURGE_INTERVAL
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "enabled": True,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+
+response_cache = ResponseCache() if RESPONSE_CACHE_ENABLED else None
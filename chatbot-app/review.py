@@ -0,0 +1,68 @@
+import time
+
+# --- Spaced Repetition (SM-2) ---
+MIN_EASE = 1.3
+DEFAULT_EASE = 2.5
+RELEARN_DELAY_SECONDS = 10 * 60  # failed cards come back in the same study session
+DAY_SECONDS = 24 * 60 * 60
+
+def sm2(quality, repetitions, interval_days, ease):
+    """
+    Applies one SM-2 review. quality is 0-5 (below 3 counts as forgotten).
+    Returns the new (repetitions, interval_days, ease).
+    """
+    if quality < 3:
+        repetitions = 0
+        interval_days = 0
+    else:
+        repetitions += 1
+        if repetitions == 1:
+            interval_days = 1
+        elif repetitions == 2:
+            interval_days = 6
+        else:
+            interval_days = round(interval_days * ease)
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return repetitions, interval_days, ease
+
+def schedule_new_cards(db, user_id, card_ids, now=None):
+    """Makes newly created cards due immediately. The caller commits."""
+    now = int(now or time.time())
+    db.executemany("INSERT OR IGNORE INTO flashcard_reviews (user_id, card_id, due_at) VALUES (?, ?, ?)",
+                   [(user_id, card_id, now) for card_id in card_ids])
+
+def next_due_card(db, user_id, now=None):
+    """Returns the user's most overdue card, or None if nothing is due."""
+    now = int(now or time.time())
+    # Walks idx_flashcard_reviews_due in due order with a primary-key lookup per entry and stops
+    # at the first card that still exists. Foreign keys aren't enforced (db.py doesn't turn them
+    # on), so review rows of deleted cards can linger; joining before the LIMIT skips them
+    # instead of letting one orphan hide every other due card.
+    row = db.execute(
+        """
+        SELECT f.id, f.topic, f.question, f.answer, r.due_at
+        FROM flashcard_reviews r
+        JOIN flashcards f ON f.id = r.card_id
+        WHERE r.user_id = ? AND r.due_at <= ?
+        ORDER BY r.due_at
+        LIMIT 1
+        """, (user_id, now)
+    ).fetchone()
+    return dict(row) if row else None
+
+def record_review(db, user_id, card_id, quality, now=None):
+    """Updates a card's review state after an answer. Returns False if the user has no such card."""
+    now = int(now or time.time())
+    state = db.execute("SELECT repetitions, interval_days, ease FROM flashcard_reviews WHERE user_id = ? AND card_id = ?",
+                       (user_id, card_id)).fetchone()
+    if not state:
+        return False
+    repetitions, interval_days, ease = sm2(quality, state["repetitions"], state["interval_days"], state["ease"])
+    due_at = now + (interval_days * DAY_SECONDS if interval_days else RELEARN_DELAY_SECONDS)
+    db.execute(
+        "UPDATE flashcard_reviews SET repetitions = ?, interval_days = ?, ease = ?, due_at = ?, last_reviewed_at = ? "
+        "WHERE user_id = ? AND card_id = ?",
+        (repetitions, interval_days, ease, due_at, now, user_id, card_id)
+    )
+    db.commit()
+    return True
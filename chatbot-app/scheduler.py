@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+# --- LLM Request Scheduler ---
+# All LLM calls in this process go through one scheduler. Interactive chat is
+# always dispatched before bulk exports, bulk work has its own (smaller)
+# concurrency cap so it can never take every slot, and inside a class users
+# are served round-robin so one user's burst of exports can't starve others.
+PRIORITY_CLASSES = ("interactive", "bulk")  # highest priority first
+CLASS_CAPS = {
+    "interactive": int(os.getenv("LLM_CONCURRENCY_INTERACTIVE", "8")),
+    "bulk": int(os.getenv("LLM_CONCURRENCY_BULK", "2")),
+}
+TOTAL_CAP = int(os.getenv("LLM_CONCURRENCY_TOTAL", "8"))
+
+
+class LLMScheduler:
+    def __init__(self, class_caps=CLASS_CAPS, total_cap=TOTAL_CAP):
+        self.class_caps = dict(class_caps)
+        self.total_cap = total_cap
+        self._cond = threading.Condition()
+        self._waiting = {c: OrderedDict() for c in PRIORITY_CLASSES}  # class -> user_id -> deque of tickets
+        self._running = {c: 0 for c in PRIORITY_CLASSES}
+        self._granted = set()
+        self._metrics = {c: {"completed": 0, "total_wait": 0.0, "max_wait": 0.0} for c in PRIORITY_CLASSES}
+
+    def _dispatch(self):
+        """Grants free slots to waiting tickets. Must be called with the lock held."""
+        granted_any = False
+        for cls in PRIORITY_CLASSES:
+            queue = self._waiting[cls]
+            while queue and sum(self._running.values()) < self.total_cap and self._running[cls] < self.class_caps[cls]:
+                user_id, tickets = next(iter(queue.items()))
+                self._granted.add(tickets.popleft())
+                if tickets:
+                    queue.move_to_end(user_id)  # round-robin: this user goes to the back of the line
+                else:
+                    del queue[user_id]
+                self._running[cls] += 1
+                granted_any = True
+        if granted_any:
+            self._cond.notify_all()
+
+    def run(self, priority, user_id, fn, *args, **kwargs):
+        """Waits for a slot in the given priority class, then calls fn(*args, **kwargs)."""
+        if priority not in self._waiting:
+            raise ValueError(f"Unknown priority class: {priority}")
+        ticket = object()
+        enqueued_at = time.monotonic()
+        with self._cond:
+            self._waiting[priority].setdefault(user_id, deque()).append(ticket)
+            self._dispatch()
+            while ticket not in self._granted:
+                self._cond.wait()
+            self._granted.discard(ticket)
+            wait = time.monotonic() - enqueued_at
+            metrics = self._metrics[priority]
+            metrics["completed"] += 1
+            metrics["total_wait"] += wait
+            metrics["max_wait"] = max(metrics["max_wait"], wait)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._cond:
+                self._running[priority] -= 1
+                self._dispatch()
+
+    def stats(self):
+        with self._cond:
+            return {
+                cls: {
+                    "running": self._running[cls],
+                    "waiting": sum(len(t) for t in self._waiting[cls].values()),
+                    "completed": m["completed"],
+                    "avg_wait": round(m["total_wait"] / m["completed"], 3) if m["completed"] else 0.0,
+                    "max_wait": round(m["max_wait"], 3),
+                }
+                for cls, m in self._metrics.items()
+            }
+
+
+llm_scheduler = LLMScheduler()
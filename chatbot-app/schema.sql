@@ -24,6 +24,10 @@ CREATE TABLE IF NOT EXISTS messages (
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
+-- History reads and the sidebar's per-conversation subqueries
+CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages (conversation_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_conversations_user ON conversations (user_id);
+
 CREATE TABLE IF NOT EXISTS remember_tokens (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     user_id INTEGER NOT NULL,
@@ -31,4 +35,64 @@ CREATE TABLE IF NOT EXISTS remember_tokens (
     expires_at TEXT NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id)
-);
\ No newline at end of file
+);
+
+-- One deck per flashcard generation run; last_message_id marks how far into
+-- the conversation it covers so the next run only processes newer turns.
+CREATE TABLE IF NOT EXISTS flashcard_decks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conversation_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    last_message_id INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_flashcard_decks_conversation ON flashcard_decks (conversation_id, last_message_id);
+
+CREATE TABLE IF NOT EXISTS flashcards (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    deck_id INTEGER NOT NULL,
+    conversation_id INTEGER NOT NULL,
+    topic TEXT NOT NULL DEFAULT '',
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    FOREIGN KEY (deck_id) REFERENCES flashcard_decks(id) ON DELETE CASCADE,
+    FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_flashcards_conversation ON flashcards (conversation_id, id);
+
+-- Spaced-repetition (SM-2) state per user and card. due_at is unix seconds.
+CREATE TABLE IF NOT EXISTS flashcard_reviews (
+    user_id INTEGER NOT NULL,
+    card_id INTEGER NOT NULL,
+    due_at INTEGER NOT NULL,
+    interval_days INTEGER NOT NULL DEFAULT 0,
+    ease REAL NOT NULL DEFAULT 2.5,
+    repetitions INTEGER NOT NULL DEFAULT 0,
+    last_reviewed_at INTEGER,
+    PRIMARY KEY (user_id, card_id),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (card_id) REFERENCES flashcards(id) ON DELETE CASCADE
+);
+
+-- Covering index for the due queue: the next due card is a single index seek.
+CREATE INDEX IF NOT EXISTS idx_flashcard_reviews_due ON flashcard_reviews (user_id, due_at, card_id);
+
+-- Cold storage: conversations idle for a while have their messages moved here
+-- as one compressed blob (see archive.py) and are restored on first access.
+CREATE TABLE IF NOT EXISTS conversation_archives (
+    conversation_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    codec TEXT NOT NULL, -- 'zstd' or 'zlib'
+    payload BLOB NOT NULL,
+    raw_size INTEGER NOT NULL,
+    message_count INTEGER NOT NULL,
+    preview TEXT, -- first user message, so the sidebar doesn't need to decompress
+    last_message_at DATETIME,
+    archived_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
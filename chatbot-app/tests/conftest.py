@@ -0,0 +1,25 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_PATH = os.path.join(APP_DIR, "schema.sql")
+
+# The app is a flat set of modules; make them importable from the tests.
+sys.path.insert(0, APP_DIR)
+
+
+@pytest.fixture
+def db():
+    """In-memory database with the app schema, configured like db.get_db()."""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    with open(SCHEMA_PATH, "r") as f:
+        conn.executescript(f.read())
+    conn.execute("INSERT INTO users (id, username, password) VALUES (1, 'quokka', 'x')")
+    conn.execute("INSERT INTO conversations (id, user_id) VALUES (1, 1)")
+    conn.commit()
+    yield conn
+    conn.close()
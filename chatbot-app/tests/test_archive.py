@@ -0,0 +1,151 @@
+import shutil
+import sqlite3
+
+import pytest
+
+from archive import archive_conversation, archive_idle_conversations, restore_conversation
+
+OLD = ["2020-01-01 10:00:00", "2020-01-01 10:05:00", "2020-01-01 10:09:30"]
+
+
+def add_messages(db, conversation_id, timestamps):
+    for i, ts in enumerate(timestamps):
+        db.execute("INSERT INTO messages (conversation_id, user_id, message, response, timestamp) VALUES (?, 1, ?, ?, ?)",
+                   (conversation_id, f"question {i} ✨", f"answer {i}", ts))
+    db.commit()
+
+
+def messages(db, conversation_id):
+    rows = db.execute("SELECT id, user_id, message, response, timestamp FROM messages WHERE conversation_id = ? ORDER BY id",
+                      (conversation_id,)).fetchall()
+    return [tuple(r) for r in rows]
+
+
+def archived_ids(db):
+    return [r[0] for r in db.execute("SELECT conversation_id FROM conversation_archives ORDER BY conversation_id")]
+
+
+class LateMessage:
+    """Wraps a connection and lets a new message land just before archive_idle_conversations takes the write lock."""
+
+    def __init__(self, conn, conversation_id):
+        self.conn = conn
+        self.conversation_id = conversation_id
+
+    def execute(self, sql, *args):
+        if sql == "BEGIN IMMEDIATE":
+            self.conn.execute("INSERT INTO messages (conversation_id, user_id, message, response) VALUES (?, 1, 'back again', 'hi')",
+                              (self.conversation_id,))
+            self.conn.commit()
+        return self.conn.execute(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+def test_archive_and_restore_keep_ids_order_and_timestamps(db):
+    add_messages(db, 1, OLD)
+    before = messages(db, 1)
+
+    totals = archive_idle_conversations(db, days=30)
+    assert totals["conversations"] == 1 and totals["messages"] == 3
+    assert messages(db, 1) == []
+    preview, last_message_at = db.execute("SELECT preview, last_message_at FROM conversation_archives WHERE conversation_id = 1").fetchone()
+    assert (preview, last_message_at) == ("question 0 ✨", OLD[-1])
+
+    assert restore_conversation(db, 1)
+    assert messages(db, 1) == before
+    assert archived_ids(db) == []
+    assert not restore_conversation(db, 1)
+
+
+def test_recently_active_conversations_are_not_archived(db):
+    db.execute("INSERT INTO conversations (id, user_id) VALUES (2, 1)")
+    add_messages(db, 1, OLD)
+    add_messages(db, 2, OLD[:1] + ["2099-01-01 00:00:00"])
+
+    assert archive_idle_conversations(db, days=30)["conversations"] == 1
+    assert archived_ids(db) == [1]
+    assert len(messages(db, 2)) == 2
+
+
+def test_activity_after_the_scan_keeps_the_conversation_hot(db):
+    add_messages(db, 1, OLD)
+
+    totals = archive_idle_conversations(LateMessage(db, 1), days=30)
+    assert totals["conversations"] == 0
+    assert archived_ids(db) == []
+    assert len(messages(db, 1)) == 4
+
+
+def test_partial_restore_merges_without_duplicates(db):
+    add_messages(db, 1, OLD)
+    before = messages(db, 1)
+    archive_idle_conversations(db, days=30)
+
+    # A restore that inserted the first message and then died before deleting the archive row
+    db.execute("INSERT INTO messages (id, conversation_id, user_id, message, response, timestamp) VALUES (?, 1, ?, ?, ?, ?)", before[0])
+    db.commit()
+
+    assert restore_conversation(db, 1)
+    assert messages(db, 1) == before
+
+
+def test_rearchiving_a_partial_restore_merges_with_the_old_archive(db):
+    add_messages(db, 1, OLD)
+    before = messages(db, 1)
+    archive_idle_conversations(db, days=30)
+    db.execute("INSERT INTO messages (id, conversation_id, user_id, message, response, timestamp) VALUES (?, 1, ?, ?, ?, ?)", before[1])
+    db.commit()
+
+    db.execute("BEGIN IMMEDIATE")
+    count, _, _ = archive_conversation(db, 1, 1)
+    db.commit()
+    assert count == 3
+    assert restore_conversation(db, 1)
+    assert messages(db, 1) == before
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    """The Flask app pointed at a database in tmp_path (init_db reads schema.sql from the working directory)."""
+    for name in ("bcrypt", "flask_cors", "fpdf", "requests"):
+        pytest.importorskip(name)
+    from conftest import SCHEMA_PATH
+    import db as db_module
+
+    shutil.copy(SCHEMA_PATH, tmp_path / "schema.sql")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(db_module, "DATABASE", str(tmp_path / "chat.db"))
+    import app as app_module
+    from ownership import ownership_cache
+    monkeypatch.setattr(ownership_cache, "epoch_path", str(tmp_path / "conversations.epoch"))
+    db_module.init_db()
+    return app_module
+
+
+def test_archived_conversation_is_listed_and_restored_on_load(app_module):
+    import db as db_module
+
+    conn = sqlite3.connect(db_module.DATABASE, isolation_level=None)
+    conn.execute("INSERT INTO users (id, username, password) VALUES (1, 'quokka', 'x')")
+    conn.execute("INSERT INTO conversations (id, user_id, title) VALUES (1, 1, 'Old chat')")
+    conn.execute("INSERT INTO conversations (id, user_id, title) VALUES (2, 1, 'New chat')")
+    add_messages(conn, 1, OLD)
+    add_messages(conn, 2, ["2099-01-01 00:00:00"])
+    assert archive_idle_conversations(conn, days=30)["conversations"] == 1
+
+    app = app_module.app
+    with app.app_context():
+        listed = app_module.list_conversations(1)
+    assert [c["id"] for c in listed] == [2, 1]
+    assert listed[1]["title"] == "Old chat - question 0 ✨"
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = 1
+    reply = client.get("/load_conversation/1").get_json()
+    assert reply["success"]
+    assert reply["history"] == [[f"question {i} ✨", f"answer {i}"] for i in range(3)]
+    assert conn.execute("SELECT COUNT(*) FROM conversation_archives").fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,87 @@
+import pytest
+
+requests = pytest.importorskip("requests")
+
+import chatbot
+
+
+class FakeResponse:
+    def __init__(self, status_code, content="ok"):
+        self.status_code = status_code
+        self.headers = {"Retry-After": "0"}
+        self._content = content
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(str(self.status_code))
+
+    def json(self):
+        return {"choices": [{"message": {"content": self._content}}]}
+
+
+@pytest.fixture
+def groq(monkeypatch):
+    """Replaces the HTTP call; `statuses` maps model -> status codes (or exceptions to raise), in order."""
+    calls = []
+    statuses = {}
+
+    def post(url, headers, json, timeout):
+        model = json["model"]
+        calls.append(model)
+        queue = statuses.get(model, [])
+        status = queue.pop(0) if queue else 200
+        if isinstance(status, Exception):
+            raise status
+        return FakeResponse(status, content=f"reply from {model}")
+
+    monkeypatch.setattr(chatbot.requests, "post", post)
+    monkeypatch.setattr(chatbot.time, "sleep", lambda seconds: None)
+    return calls, statuses
+
+
+MESSAGES = [{"role": "user", "content": "x" * 20_000}]
+
+
+@pytest.mark.parametrize("task", ["summary", "flashcards"])
+def test_bulk_fallback_is_not_the_chat_model(task):
+    chat_fallback = chatbot.fallback_model("chat", chatbot.DEFAULT_MODEL)
+    bulk_fallback = chatbot.fallback_model(task, chatbot.DEFAULT_MODEL)
+    assert bulk_fallback and bulk_fallback != chat_fallback
+    assert all(model != bulk_fallback for _, model in chatbot.MODEL_ROUTES["chat"])
+
+
+def test_bulk_429_falls_back_to_bulk_model(groq):
+    calls, statuses = groq
+    statuses[chatbot.DEFAULT_MODEL] = [429]
+    reply = chatbot.ask_groq(MESSAGES, task="summary")
+    assert calls == [chatbot.DEFAULT_MODEL, chatbot.BULK_FALLBACK_MODEL]
+    assert reply == f"reply from {chatbot.BULK_FALLBACK_MODEL}"
+
+
+def test_fallback_still_runs_when_last_attempt_is_429(groq):
+    calls, statuses = groq
+    fallback = chatbot.fallback_model("summary", chatbot.DEFAULT_MODEL)
+    errors = [requests.exceptions.ConnectionError("reset")] * (chatbot.MAX_RETRIES - 1)
+    statuses[chatbot.DEFAULT_MODEL] = errors + [429]
+    reply = chatbot.ask_groq(MESSAGES, task="summary")
+    assert calls == [chatbot.DEFAULT_MODEL] * chatbot.MAX_RETRIES + [fallback]
+    assert reply == f"reply from {fallback}"
+
+
+def test_gives_up_when_every_model_is_rate_limited(groq):
+    calls, statuses = groq
+    statuses[chatbot.DEFAULT_MODEL] = [429] * 10
+    statuses[chatbot.BULK_FALLBACK_MODEL] = [429] * 10
+    reply = chatbot.ask_groq(MESSAGES, task="flashcards")
+    assert chatbot.is_error_reply(reply)
+    assert calls.count(chatbot.DEFAULT_MODEL) == 1
+    assert len(calls) == chatbot.MAX_RETRIES + 1
+
+
+@pytest.mark.parametrize("content", [None, ""])
+def test_empty_content_is_an_error_reply(monkeypatch, content):
+    monkeypatch.setattr(chatbot.requests, "post", lambda *args, **kwargs: FakeResponse(200, content=content))
+    reply = chatbot.ask_groq([{"role": "user", "content": "hi"}])
+    assert reply.startswith("⚠️")
+    assert chatbot.is_error_reply(reply)
+    assert chatbot.is_error_reply(content)
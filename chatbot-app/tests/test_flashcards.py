@@ -0,0 +1,49 @@
+from flashcards import get_conversation_flashcards, last_covered_message_id, update_conversation_flashcards
+
+CARD_TEXT = "=== Recursion ===\nQ: What is a base case?\nA: The case that stops the recursion.\n"
+
+
+def add_turn(db, message, response="ok"):
+    db.execute("INSERT INTO messages (conversation_id, user_id, message, response) VALUES (1, 1, ?, ?)",
+               (message, response))
+    db.commit()
+
+
+class FakeLLM:
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    def __call__(self, history):
+        self.calls.append(history)
+        return self.replies.pop(0)
+
+
+def test_only_new_turns_are_sent(db):
+    add_turn(db, "what is recursion?")
+    llm = FakeLLM(CARD_TEXT, CARD_TEXT)
+    assert len(update_conversation_flashcards(db, 1, 1, llm)) == 1
+    add_turn(db, "and a base case?")
+    assert len(update_conversation_flashcards(db, 1, 1, llm)) == 2
+    assert [len(h) for h in llm.calls] == [1, 1]
+    assert llm.calls[1][0]["message"] == "and a base case?"
+
+
+def test_empty_parse_still_covers_the_turns(db):
+    add_turn(db, "hi there!")
+    llm = FakeLLM("Nothing to study here.")
+    assert update_conversation_flashcards(db, 1, 1, llm) == []
+    assert last_covered_message_id(db, 1) > 0
+    # Not re-sent on the next export
+    assert update_conversation_flashcards(db, 1, 1, llm) == []
+    assert len(llm.calls) == 1
+
+
+def test_failed_call_is_retried(db):
+    add_turn(db, "what is recursion?")
+    llm = FakeLLM(None, CARD_TEXT)
+    assert update_conversation_flashcards(db, 1, 1, llm) == []
+    assert last_covered_message_id(db, 1) == 0
+    assert len(update_conversation_flashcards(db, 1, 1, llm)) == 1
+    assert len(llm.calls) == 2
+    assert get_conversation_flashcards(db, 1)[0]["topic"] == "Recursion"
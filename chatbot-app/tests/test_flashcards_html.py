@@ -0,0 +1,69 @@
+import os
+import re
+
+import pytest
+
+jinja2 = pytest.importorskip("jinja2")
+
+from flashcards import EXPORT_LOGO_URL, export_assets
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+
+CARDS = [
+    {"topic": "Recursion", "question": "What is a base case?", "answer": "The case that stops the recursion."},
+    {"topic": "Recursion", "question": "<b>escaped?</b>", "answer": "</script> too"},
+]
+
+
+def render(client_side, cards=CARDS):
+    # Same autoescape setting Flask uses for .html templates; a root-relative url_for
+    # stand-in makes any url_for left in the template show up in the checks below.
+    env = jinja2.Environment(loader=jinja2.FileSystemLoader(TEMPLATES_DIR), autoescape=True)
+    env.globals["url_for"] = lambda endpoint, filename="": f"/assets/{filename}"
+    return env.get_template("flashcards.html").render(cards=cards, client_side=client_side, assets=export_assets())
+
+
+@pytest.mark.parametrize("client_side", [False, True])
+def test_export_has_no_root_relative_references(client_side):
+    html = render(client_side)
+    assert not re.search(r"""(?:src|href)\s*=\s*["']/""", html)
+    assert not re.search(r"""url\(\s*["']?/(?!/)""", html)
+    assert "/assets/" not in html
+
+
+@pytest.mark.parametrize("client_side", [False, True])
+def test_export_inlines_css_and_links_hosted_logo(client_side):
+    html = render(client_side)
+    assert export_assets()["css"].strip() in html
+    assert f'src="{EXPORT_LOGO_URL}"' in html
+    assert "data:image" not in html
+
+
+@pytest.mark.parametrize("client_side", [False, True])
+def test_export_fetches_no_web_fonts(client_side):
+    html = render(client_side)
+    assert "@import" not in html
+    assert "fonts.googleapis.com" not in html
+
+
+@pytest.mark.parametrize("client_side", [False, True])
+def test_export_size_scales_with_card_content(client_side):
+    # Fixed overhead is the inlined CSS/JS only; each extra card adds roughly its own text
+    base = len(render(client_side, cards=CARDS[:1]))
+    assert base < 16 * 1024
+    many = [dict(CARDS[0], question=f"Question {i}?") for i in range(50)]
+    per_card = (len(render(client_side, cards=many)) - base) / 49
+    assert per_card < 600
+
+
+def test_interactive_export_inlines_script_and_data():
+    html = render(client_side=True)
+    assert "<script src=" not in html
+    assert export_assets()["js"].strip() in html
+    # Card text can't close the data <script> early
+    assert "</script> too" not in html
+
+
+def test_static_export_escapes_card_text():
+    html = render(client_side=False)
+    assert "&lt;b&gt;escaped?&lt;/b&gt;" in html
@@ -0,0 +1,34 @@
+import pytest
+
+pytest.importorskip("flask")  # maintenance imports db.py
+
+import maintenance
+from ownership import ownership_cache
+
+
+@pytest.fixture(autouse=True)
+def epoch_in_tmp(tmp_path, monkeypatch):
+    monkeypatch.setattr(ownership_cache, "epoch_path", str(tmp_path / "conversations.epoch"))
+
+
+def conversation_ids(db):
+    return [r[0] for r in db.execute("SELECT id FROM conversations ORDER BY id")]
+
+
+def test_compact_removes_only_old_empty_conversations(db):
+    db.execute("INSERT INTO conversations (id, user_id, timestamp) VALUES (2, 1, datetime('now', '-1 day'))")
+    db.execute("INSERT INTO conversations (id, user_id, timestamp) VALUES (3, 1, datetime('now', '-1 day'))")
+    db.execute("INSERT INTO messages (conversation_id, user_id, message, response) VALUES (3, 1, 'hi', 'hello')")
+    db.commit()
+
+    assert maintenance.compact_empty_conversations(db) == 1
+    # 1: empty but just created (its first message may still be queued); 3: has messages
+    assert conversation_ids(db) == [1, 3]
+
+
+def test_compact_age_cutoff_is_configurable(db):
+    db.execute("UPDATE conversations SET timestamp = datetime('now', '-5 minutes') WHERE id = 1")
+    db.commit()
+    assert maintenance.compact_empty_conversations(db, min_age_minutes=10) == 0
+    assert maintenance.compact_empty_conversations(db, min_age_minutes=1) == 1
+    assert conversation_ids(db) == []
@@ -0,0 +1,84 @@
+import os
+
+from ownership import OwnershipCache
+
+
+class CountingDB:
+    """Wraps a connection and counts the queries that reach it."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.queries = 0
+
+    def execute(self, *args):
+        self.queries += 1
+        return self.conn.execute(*args)
+
+
+def two_workers(tmp_path):
+    epoch = str(tmp_path / "conversations.epoch")
+    return OwnershipCache(epoch_path=epoch), OwnershipCache(epoch_path=epoch)
+
+
+def test_cached_owner_check_skips_the_database(db, tmp_path):
+    cache = OwnershipCache(epoch_path=str(tmp_path / "conversations.epoch"))
+    counting = CountingDB(db)
+    assert cache.owns(counting, 1, 1)
+    assert cache.owns(counting, 1, 1)
+    assert counting.queries == 1
+    assert not cache.owns(counting, 2, 1)
+
+
+def test_delete_in_one_worker_invalidates_the_other(db, tmp_path):
+    worker_a, worker_b = two_workers(tmp_path)
+    assert worker_a.owns(db, 1, 1) and worker_b.owns(db, 1, 1)
+
+    db.execute("DELETE FROM conversations WHERE id = 1")
+    db.commit()
+    worker_a.invalidate()
+
+    assert not worker_b.owns(db, 1, 1)
+    assert not worker_a.owns(db, 1, 1)
+
+
+def test_reassignment_in_one_worker_invalidates_the_other(db, tmp_path):
+    db.execute("INSERT INTO users (id, username, password) VALUES (2, 'wombat', 'x')")
+    worker_a, worker_b = two_workers(tmp_path)
+    assert worker_b.owns(db, 1, 1)
+
+    db.execute("UPDATE conversations SET user_id = 2 WHERE id = 1")
+    db.commit()
+    worker_a.invalidate()
+
+    assert not worker_b.owns(db, 1, 1)
+    assert worker_b.owns(db, 2, 1)
+
+
+def test_invalidation_seen_when_only_the_inode_changes(db, tmp_path):
+    worker_a, worker_b = two_workers(tmp_path)
+    worker_a.invalidate()  # create the epoch file
+    epoch = worker_a.epoch_path
+    assert worker_b.owns(db, 1, 1)
+    before = os.stat(epoch)
+
+    db.execute("DELETE FROM conversations WHERE id = 1")
+    db.commit()
+    # Another worker replaces the file within the same mtime tick (coarse-mtime filesystems)
+    tmp = epoch + ".other"
+    with open(tmp, "w") as f:
+        f.write("other worker")
+    os.replace(tmp, epoch)
+    os.utime(epoch, ns=(before.st_atime_ns, before.st_mtime_ns))
+    after = os.stat(epoch)
+    assert after.st_mtime_ns == before.st_mtime_ns and after.st_ino != before.st_ino
+
+    assert not worker_b.owns(db, 1, 1)
+
+
+def test_no_invalidation_keeps_cache(db, tmp_path):
+    worker_a, worker_b = two_workers(tmp_path)
+    worker_a.invalidate()
+    counting = CountingDB(db)
+    assert worker_b.owns(counting, 1, 1)
+    assert worker_b.owns(counting, 1, 1)
+    assert counting.queries == 1
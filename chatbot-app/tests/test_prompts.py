@@ -0,0 +1,51 @@
+import pytest
+
+from prompts import (
+    TEMPLATES,
+    build_export_messages,
+    count_message_tokens,
+    count_tokens,
+)
+
+
+def make_history(turns, size=200):
+    return [{"message": f"question {i} " + "q" * size, "response": f"answer {i} " + "a" * size} for i in range(turns)]
+
+
+@pytest.mark.parametrize("kind", sorted(TEMPLATES))
+@pytest.mark.parametrize("max_tokens", [1500, 4000, 24000])
+def test_large_history_fits_budget(kind, max_tokens):
+    history = make_history(2000)
+    messages = build_export_messages(kind, history, max_tokens=max_tokens)
+    assert count_message_tokens(messages) <= max_tokens
+
+
+@pytest.mark.parametrize("kind", sorted(TEMPLATES))
+def test_single_oversized_turn_is_truncated_to_budget(kind):
+    history = [{"message": "x" * 200_000, "response": "the answer is at the end"}]
+    messages = build_export_messages(kind, history, max_tokens=2000)
+    assert count_message_tokens(messages) <= 2000
+    assert messages[0]["content"].endswith("the answer is at the end")
+
+
+def test_newest_turns_are_kept():
+    history = make_history(500)
+    prompt = build_export_messages("summary", history, max_tokens=3000)[0]["content"]
+    assert "question 499 " in prompt and "answer 499 " in prompt
+    assert "question 0 " not in prompt
+    # Kept turns are a contiguous run ending at the newest one
+    kept = [i for i in range(500) if f"question {i} " in prompt]
+    assert kept == list(range(kept[0], 500))
+
+
+def test_small_history_is_sent_once_and_whole():
+    history = make_history(3, size=10)
+    messages = build_export_messages("flashcards", history, max_tokens=24000)
+    assert len(messages) == 1
+    for turn in history:
+        assert messages[0]["content"].count(turn["message"]) == 1
+
+
+def test_budget_smaller_than_template_raises():
+    with pytest.raises(ValueError):
+        build_export_messages("summary", make_history(1), max_tokens=count_tokens(TEMPLATES["summary"]))
@@ -0,0 +1,37 @@
+import response_cache
+from response_cache import ResponseCache
+
+
+def disk_rows(cache):
+    return cache._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+
+def test_hit_after_put_and_normalized_key(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.db"), ttl=60)
+    cache.put("Explain recursion?", "model-a", "It calls itself.")
+    assert cache.get("  explain   RECURSION ", "model-a") == "It calls itself."
+    assert cache.get("explain recursion", "model-b") is None
+
+
+def test_disk_tier_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResponseCache(path=path, ttl=60).put("hi", "m", "hello")
+    other = ResponseCache(path=path, ttl=60)
+    assert other.get("hi", "m") == "hello"
+    assert other.stats()["disk_hits"] == 1
+
+
+def test_expired_rows_are_purged_on_write(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: clock[0])
+    cache = ResponseCache(path=str(tmp_path / "cache.db"), ttl=60)
+    for i in range(50):
+        cache.put(f"question {i}", "m", "answer")
+    assert disk_rows(cache) == 50
+
+    # Never read again, but swept by a later write once the purge interval has passed
+    clock[0] += response_cache.PURGE_INTERVAL + 61
+    cache.put("fresh question", "m", "answer")
+    assert disk_rows(cache) == 1
+    assert cache.get("question 1", "m") is None
+    assert cache.get("fresh question", "m") == "answer"
@@ -0,0 +1,41 @@
+from flashcards import save_deck
+from review import next_due_card, record_review, sm2
+
+
+def make_cards(db, count):
+    save_deck(db, 1, 1, 0, [{"topic": "T", "question": f"q{i}", "answer": f"a{i}"} for i in range(count)])
+    return [r["id"] for r in db.execute("SELECT id FROM flashcards ORDER BY id")]
+
+
+def test_next_due_card_is_most_overdue(db):
+    card_ids = make_cards(db, 3)
+    for offset, card_id in zip((30, 10, 20), card_ids):
+        db.execute("UPDATE flashcard_reviews SET due_at = ? WHERE card_id = ?", (1000 - offset, card_id))
+    assert next_due_card(db, 1, now=1000)["id"] == card_ids[0]
+    assert next_due_card(db, 1, now=900) is None
+
+
+def test_orphaned_review_row_does_not_hide_due_cards(db):
+    card_ids = make_cards(db, 2)
+    db.execute("UPDATE flashcard_reviews SET due_at = 100 WHERE card_id = ?", (card_ids[0],))
+    db.execute("UPDATE flashcard_reviews SET due_at = 200 WHERE card_id = ?", (card_ids[1],))
+    # Foreign keys are off, so deleting the card leaves its review row behind
+    db.execute("DELETE FROM flashcards WHERE id = ?", (card_ids[0],))
+    db.commit()
+    assert db.execute("SELECT COUNT(*) FROM flashcard_reviews WHERE card_id = ?", (card_ids[0],)).fetchone()[0] == 1
+
+    card = next_due_card(db, 1, now=1000)
+    assert card is not None and card["id"] == card_ids[1]
+
+
+def test_record_review_pushes_card_back(db):
+    card_id = make_cards(db, 1)[0]
+    assert record_review(db, 1, card_id, quality=5, now=1000)
+    assert next_due_card(db, 1, now=1000) is None
+    assert not record_review(db, 2, card_id, quality=5, now=1000)
+
+
+def test_sm2_intervals():
+    assert sm2(5, 0, 0, 2.5)[:2] == (1, 1)
+    assert sm2(5, 1, 1, 2.5)[:2] == (2, 6)
+    assert sm2(1, 4, 30, 2.5)[:2] == (0, 0)
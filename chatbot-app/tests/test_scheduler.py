@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import LLMScheduler
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+class Job:
+    """Runs one scheduler.run() call in a thread; the LLM call logs its name and blocks until released."""
+
+    def __init__(self, scheduler, priority, user_id, name, log, block=False):
+        self.name = name
+        self.log = log
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+        self.thread = threading.Thread(target=scheduler.run, args=(priority, user_id, self.call), daemon=True)
+
+    def call(self):
+        self.log.append(self.name)
+        assert self.release.wait(5)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+
+def submit(scheduler, priority, user_id, name, log, block=False):
+    """Starts a job and waits until it is running or queued, so submission order is deterministic."""
+    before = scheduler.stats()[priority]
+    job = Job(scheduler, priority, user_id, name, log, block).start()
+    wait_until(lambda: name in log or scheduler.stats()[priority]["waiting"] > before["waiting"])
+    return job
+
+
+def test_interactive_is_admitted_before_queued_bulk():
+    scheduler = LLMScheduler(class_caps={"interactive": 1, "bulk": 1}, total_cap=1)
+    log = []
+    running = submit(scheduler, "bulk", 1, "bulk-running", log, block=True)
+    queued_bulk = submit(scheduler, "bulk", 2, "bulk-queued", log)
+    chat = submit(scheduler, "interactive", 3, "chat", log)
+    assert log == ["bulk-running"]
+
+    running.release.set()
+    for job in (running, queued_bulk, chat):
+        job.thread.join(5)
+    assert log == ["bulk-running", "chat", "bulk-queued"]
+
+
+def test_class_and_total_caps_hold():
+    scheduler = LLMScheduler(class_caps={"interactive": 8, "bulk": 2}, total_cap=8)
+    log = []
+    jobs = [submit(scheduler, "bulk", i, f"bulk-{i}", log, block=True) for i in range(5)]
+    jobs += [submit(scheduler, "interactive", i, f"chat-{i}", log, block=True) for i in range(10)]
+
+    stats = scheduler.stats()
+    assert (stats["bulk"]["running"], stats["bulk"]["waiting"]) == (2, 3)
+    assert (stats["interactive"]["running"], stats["interactive"]["waiting"]) == (6, 4)
+    assert len(log) == 8
+
+    # Freeing a bulk slot goes to waiting chat, not to the next bulk job
+    jobs[0].release.set()
+    wait_until(lambda: len(log) == 9)
+    assert log[-1].startswith("chat")
+    assert scheduler.stats()["bulk"]["running"] == 1
+
+    for job in jobs:
+        job.release.set()
+    for job in jobs:
+        job.thread.join(5)
+    assert sorted(log) == sorted(job.name for job in jobs)
+    assert all(s["running"] == 0 and s["waiting"] == 0 for s in scheduler.stats().values())
+
+
+def test_users_are_served_round_robin():
+    scheduler = LLMScheduler(class_caps={"interactive": 1, "bulk": 1}, total_cap=1)
+    log = []
+    running = submit(scheduler, "bulk", "other", "running", log, block=True)
+    jobs = [submit(scheduler, "bulk", "alice", f"alice-{i}", log) for i in range(3)]
+    jobs.append(submit(scheduler, "bulk", "bob", "bob-0", log))
+
+    running.release.set()
+    for job in [running] + jobs:
+        job.thread.join(5)
+    # bob's one export doesn't wait behind all of alice's
+    assert log == ["running", "alice-0", "bob-0", "alice-1", "alice-2"]
+
+
+def test_wait_metrics_are_recorded():
+    scheduler = LLMScheduler(class_caps={"interactive": 1, "bulk": 1}, total_cap=1)
+    log = []
+    running = submit(scheduler, "bulk", 1, "running", log, block=True)
+    queued = submit(scheduler, "bulk", 2, "queued", log)
+    time.sleep(0.1)
+    running.release.set()
+    running.thread.join(5)
+    queued.thread.join(5)
+
+    stats = scheduler.stats()["bulk"]
+    assert stats["completed"] == 2
+    assert stats["max_wait"] >= 0.1
+    assert 0.05 <= stats["avg_wait"] <= stats["max_wait"]
+    assert scheduler.stats()["interactive"] == {"running": 0, "waiting": 0, "completed": 0, "avg_wait": 0.0, "max_wait": 0.0}
+
+
+def test_run_returns_the_result_and_frees_the_slot_on_error():
+    scheduler = LLMScheduler(class_caps={"interactive": 1, "bulk": 1}, total_cap=1)
+    assert scheduler.run("interactive", 1, lambda a, b=0: a + b, 2, b=3) == 5
+    def failing_call():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        scheduler.run("interactive", 1, failing_call)
+    assert scheduler.stats()["interactive"]["running"] == 0
+    with pytest.raises(ValueError):
+        scheduler.run("urgent", 1, print)
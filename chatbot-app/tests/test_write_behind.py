@@ -0,0 +1,130 @@
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("flask")  # db.py (imported by write_behind) needs it
+
+from conftest import APP_DIR, SCHEMA_PATH
+
+WRITER_SCRIPT = textwrap.dedent("""
+    import os, signal, sys, time
+    sys.path.insert(0, {app_dir!r})
+    from write_behind import message_writer
+    for i in range(3):
+        message_writer.write(1, 1, f"question {{i}}", "answer")
+    print("queued", flush=True)
+    time.sleep(30)  # SIGTERM arrives here, well inside the flush interval
+""")
+
+
+def make_db(path):
+    with sqlite3.connect(path) as conn, open(SCHEMA_PATH, "r") as f:
+        conn.executescript(f.read())
+        conn.execute("INSERT INTO users (id, username, password) VALUES (1, 'quokka', 'x')")
+        conn.execute("INSERT INTO conversations (id, user_id) VALUES (1, 1)")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX signals")
+def test_sigterm_flushes_async_queue(tmp_path):
+    make_db(tmp_path / "chat.db")
+    env = dict(os.environ, MESSAGE_DURABILITY="async", MESSAGE_FLUSH_INTERVAL_MS="60000")
+    proc = subprocess.Popen([sys.executable, "-c", WRITER_SCRIPT.format(app_dir=APP_DIR)], cwd=tmp_path, env=env,
+                            stdout=subprocess.PIPE, text=True)
+    assert proc.stdout.readline().strip() == "queued"
+    proc.send_signal(signal.SIGTERM)
+    assert proc.wait(timeout=20) == 128 + signal.SIGTERM
+
+    with sqlite3.connect(tmp_path / "chat.db") as conn:
+        assert conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 3
+
+
+def test_writes_after_close_are_committed(tmp_path):
+    from write_behind import MessageWriter
+
+    make_db(tmp_path / "chat.db")
+    writer = MessageWriter(path=str(tmp_path / "chat.db"), durability="async", interval=60)
+    writer.write(1, 1, "before close", "answer")
+    writer.close()
+    writer.write(1, 1, "after close", "answer")
+    with sqlite3.connect(tmp_path / "chat.db") as conn:
+        assert conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 2
+
+
+def count_commits(writer):
+    """Counts the transactions a writer commits by wrapping its _insert."""
+    batches = []
+    insert = writer._insert
+    def counting_insert(rows):
+        batches.append(len(rows))
+        insert(rows)
+    writer._insert = counting_insert
+    return batches
+
+
+def test_group_writers_share_one_commit(tmp_path):
+    from write_behind import MessageWriter
+
+    make_db(tmp_path / "chat.db")
+    writer = MessageWriter(path=str(tmp_path / "chat.db"), durability="group", interval=0.5)
+    batches = count_commits(writer)
+    start = threading.Barrier(5)
+
+    def turn(i):
+        start.wait()
+        writer.write(1, 1, f"question {i}", "answer")  # returns only once the row is committed
+
+    threads = [threading.Thread(target=turn, args=(i,)) for i in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    writer.close()
+
+    assert batches == [5]
+    with sqlite3.connect(tmp_path / "chat.db") as conn:
+        assert conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 5
+
+
+def test_barrier_makes_queued_rows_visible(tmp_path):
+    from write_behind import MessageWriter
+
+    make_db(tmp_path / "chat.db")
+    writer = MessageWriter(path=str(tmp_path / "chat.db"), durability="async", interval=60)
+    writer.write(1, 1, "question", "answer")
+    with sqlite3.connect(tmp_path / "chat.db") as conn:
+        assert conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 0
+
+        started = time.monotonic()
+        writer.barrier(2)  # nothing queued for conversation 2: returns at once
+        writer.barrier(1)  # flushes now instead of waiting out the 60 s interval
+        assert time.monotonic() - started < 5
+        assert conn.execute("SELECT message FROM messages WHERE conversation_id = 1").fetchall() == [("question",)]
+    writer.close()
+
+
+@pytest.mark.parametrize("error", [sqlite3.OperationalError("database is locked"), MemoryError(), ValueError("bad row")])
+def test_failed_commit_reaches_group_writers_and_writer_survives(tmp_path, error):
+    from write_behind import MessageWriter
+
+    make_db(tmp_path / "chat.db")
+    writer = MessageWriter(path=str(tmp_path / "chat.db"), durability="group", interval=0)
+    insert = writer._insert
+    def failing_once(rows):
+        writer._insert = insert
+        raise error
+    writer._insert = failing_once
+
+    with pytest.raises(type(error)):
+        writer.write(1, 1, "lost", "answer")
+    writer.write(1, 1, "kept", "answer")  # the writer thread is still alive
+    writer.barrier()
+    writer.close()
+    with sqlite3.connect(tmp_path / "chat.db") as conn:
+        assert conn.execute("SELECT message FROM messages").fetchall() == [("kept",)]
@@ -4,11 +4,30 @@ import requests
 import time
 import re
 import os
+import tempfile
+import atexit
+import shutil
 from pathlib import Path
 
 API_URL = "http://localhost:5000"
 session = requests.Session()
 
+# Downloaded summary PDFs live in one temp dir, removed on exit; files older
+# than EXPORT_FILE_TTL are pruned before each new download.
+EXPORT_DIR = tempfile.mkdtemp(prefix="quokka_exports_")
+EXPORT_FILE_TTL = 300  # seconds, same as the backend's delete_file_later
+atexit.register(shutil.rmtree, EXPORT_DIR, ignore_errors=True)
+
+
+def _prune_exports():
+    cutoff = time.time() - EXPORT_FILE_TTL
+    for path in Path(EXPORT_DIR).iterdir():
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass
+
 # Helper to convert backend history to Gradio's format
 def _format_history_for_chatbot(history_list):
     formatted = []
@@ -218,14 +237,16 @@ def start_new_conversation():
     try:
         r_new = session.post(f"{API_URL}/new_conversation")
         r_new.raise_for_status()
-        new_conv_id = r_new.json().get("conversation_id")
+        data = r_new.json()
+        new_conv_id = data.get("conversation_id")
         gr.Info("New conversation started!")
-        # Return an empty chat history and the NEW conversation ID
-        # The dropdown choices will be updated in the subsequent chained event
-        return [], new_conv_id # Clear chatbot, return new_conv_id for the state
+        # The response already carries the refreshed sidebar list, so no second request is needed.
+        # The new chat has no messages yet, so it isn't listed and "New Chat" stays selected.
+        conv_dropdown_choices = [("🗁 New Chat", "EMPTY_CONVO")] + [(c['title'], c['id']) for c in data.get("conversations", [])]
+        return [], new_conv_id, gr.update(choices=conv_dropdown_choices, value="EMPTY_CONVO")
     except requests.RequestException as e:
         gr.Warning(f"Failed to start new conversation: {e}")
-        return [], gr.update(visible=True)
+        return [], gr.update(), gr.update()
 # def load_selected_conversation(conv_id):
 #     if not conv_id:
 #         return []
@@ -326,16 +347,18 @@ def generate_summary(chat_history):
     
     backend_history = _convert_chatbot_history_to_backend_format(chat_history)
     try:
-        r = session.post(f"{API_URL}/summarize_chat", json={"history": backend_history})
-        r.raise_for_status()
-        result = r.json()
-        if result["success"]:
-            file_path = result["file_path"]
-            filename = os.path.basename(file_path)
-            download_url = f"{API_URL}/files/{filename}"
-            return gr.File(value=file_path, visible=True), f"Summary ready! [Download PDF]({download_url})"
-        else:
-            return None, f"Error: {result.get('message')}"
+        # The PDF is streamed back in the same response, so there is no second download request
+        with session.post(f"{API_URL}/summarize_chat", json={"history": backend_history, "stream": True}, stream=True) as r:
+            if r.headers.get("Content-Type", "").startswith("application/json"):
+                result = r.json()
+                return None, f"Error: {result.get('message')}"
+            r.raise_for_status()
+            _prune_exports()
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf", prefix="summary_", dir=EXPORT_DIR) as temp:
+                for chunk in r.iter_content(chunk_size=64 * 1024):
+                    temp.write(chunk)
+                file_path = temp.name
+        return gr.File(value=file_path, visible=True), "Summary ready!"
     except requests.RequestException as e:
         return None, f"Error generating summary: {e}"
 
@@ -365,6 +388,39 @@ def generate_flashcards(file_format, chat_history):
         return None, f"Error generating flashcards: {e}"
 
 
+# --- Flashcard Review (spaced repetition) ---
+def _show_review_card(card):
+    # Returns updates for: review_card_state, review_question, review_answer, rating row
+    if not card:
+        return None, "🎉 No flashcards are due right now. Come back later!", gr.update(value="", visible=False), gr.update(visible=False)
+    question = f"**{card['topic']}**\n\nQ: {card['question']}" if card.get("topic") else f"Q: {card['question']}"
+    return card, question, gr.update(value="", visible=False), gr.update(visible=False)
+
+def load_next_review():
+    try:
+        r = session.get(f"{API_URL}/review/next")
+        r.raise_for_status()
+        return _show_review_card(r.json().get("card"))
+    except requests.RequestException as e:
+        gr.Warning(f"Failed to load flashcards for review: {e}")
+        return None, "", gr.update(visible=False), gr.update(visible=False)
+
+def reveal_review_answer(card):
+    if not card:
+        return gr.update(visible=False), gr.update(visible=False)
+    return gr.update(value=f"A: {card['answer']}", visible=True), gr.update(visible=True)
+
+def answer_review(card, quality):
+    if not card:
+        return load_next_review()
+    try:
+        r = session.post(f"{API_URL}/review/answer", json={"card_id": card["id"], "quality": quality})
+        r.raise_for_status()
+        return _show_review_card(r.json().get("card"))
+    except requests.RequestException as e:
+        gr.Warning(f"Failed to save review: {e}")
+        return card, gr.update(), gr.update(), gr.update()
+
 # def on_load():
 #     try:
 #         r = session.get(f"{API_URL}/check_login_status")
@@ -467,7 +523,8 @@ with gr.Blocks(theme=None, elem_id="flashcard_block", css=custom_css) as flashca
     flashcard_file = gr.File(label="Download Flashcards", visible=False, interactive=False)
     flashcard_output = gr.Markdown()
 
-with gr.Blocks(theme=gr.themes.Soft(), title="Query Quokka Chat", css=custom_css) as demo:
+# delete_cache: Gradio's own copies of served files are dropped after an hour
+with gr.Blocks(theme=gr.themes.Soft(), title="Query Quokka Chat", css=custom_css, delete_cache=(3600, 3600)) as demo:
     # gr.Markdown("# 💖 Query Quokka 💖")
     # gr.Image("assets/Query_Quokka.png", width=200, show_label=False, interactive=False, show_download_button=False, show_fullscreen_button=False, height=200, container=False)
     gr.Image(
@@ -516,6 +573,18 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Query Quokka Chat", css=custom_css
                     # flashcard_file = gr.File(label="Download Flashcards", visible=False, interactive=False)
                     # flashcard_output = gr.Markdown()
 
+                with gr.Accordion("Review Flashcards", open=False):
+                    review_card_state = gr.State(None)
+                    review_start_btn = gr.Button("Start Review", elem_id="submit_buttons")
+                    review_question = gr.Markdown()
+                    review_reveal_btn = gr.Button("Show Answer", elem_id="submit_buttons")
+                    review_answer = gr.Markdown(visible=False)
+                    with gr.Row(visible=False) as review_rating_row:
+                        review_again_btn = gr.Button("Again", elem_id="submit_buttons")
+                        review_hard_btn = gr.Button("Hard", elem_id="submit_buttons")
+                        review_good_btn = gr.Button("Good", elem_id="submit_buttons")
+                        review_easy_btn = gr.Button("Easy", elem_id="submit_buttons")
+
             with gr.Column(scale=3, elem_id="chatbot-cont"): # Main chat area
                 chatbot = gr.Chatbot(
                     type='messages', label="Query Quokka", height=500,
@@ -591,14 +660,11 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Query Quokka Chat", css=custom_css
     new_chat_btn.click(
         fn=start_new_conversation,
         inputs=[],
-        outputs=[chatbot, current_conversation_id_state] # Update chatbot and the new state
-    ).then( # Chained event to reload conversations and set the newly created one
-        fn=load_selected_conversation,
-        inputs=[current_conversation_id_state], # Pass the ID from the previous step
-        outputs=[chatbot, conversation_dd] # Now load it into the dropdown and chatbot
+        outputs=[chatbot, current_conversation_id_state, conversation_dd] # Update chatbot, the new state and the sidebar
     )
 
-    conversation_dd.change(
+    # .input (not .change) so programmatic dropdown updates from login/new chat don't trigger another load
+    conversation_dd.input(
         load_selected_conversation,
         [conversation_dd],
         [chatbot, conversation_dd] # <-- Make sure the dropdown is listed as an output
@@ -633,6 +699,15 @@ with gr.Blocks(theme=gr.themes.Soft(), title="Query Quokka Chat", css=custom_css
         inputs=[],
         outputs=generating_flashcards_msg
     )
+    # Review panel: each rating maps to an SM-2 quality score (0-5)
+    review_outputs = [review_card_state, review_question, review_answer, review_rating_row]
+    review_start_btn.click(load_next_review, [], review_outputs)
+    review_reveal_btn.click(reveal_review_answer, [review_card_state], [review_answer, review_rating_row])
+    review_again_btn.click(lambda card: answer_review(card, 1), [review_card_state], review_outputs)
+    review_hard_btn.click(lambda card: answer_review(card, 3), [review_card_state], review_outputs)
+    review_good_btn.click(lambda card: answer_review(card, 4), [review_card_state], review_outputs)
+    review_easy_btn.click(lambda card: answer_review(card, 5), [review_card_state], review_outputs)
+
     # demo.load(on_load, [], [auth_ui, chat_ui, chatbot, conversation_dd])
     demo.load(
         on_load, 
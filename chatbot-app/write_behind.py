@@ -0,0 +1,170 @@
+import atexit
+import os
+import signal
+import sqlite3
+import sys
+import threading
+import time
+
+from db import DATABASE
+
+# --- Write-behind buffer for chat messages ---
+# /chat hands its message row to a background writer that inserts whatever has
+# queued up in one transaction (a "group commit"), so concurrent turns share a
+# single fsync instead of paying one each.
+#
+# MESSAGE_DURABILITY:
+#   "sync"  - insert and commit immediately (the old behaviour)
+#   "group" - queue, and wait until the group commit containing the row is done (default)
+#   "async" - queue and return at once; rows are committed within the flush interval
+#             and on shutdown (exit or SIGTERM), so a crash or SIGKILL can lose the
+#             last interval of messages
+MESSAGE_DURABILITY = os.getenv("MESSAGE_DURABILITY", "group")
+MESSAGE_FLUSH_INTERVAL = float(os.getenv("MESSAGE_FLUSH_INTERVAL_MS", "10")) / 1000
+MAX_BATCH = 500
+
+
+class MessageWriter:
+    def __init__(self, path=DATABASE, durability=MESSAGE_DURABILITY, interval=MESSAGE_FLUSH_INTERVAL):
+        if durability not in ("sync", "group", "async"):
+            raise ValueError(f"Unknown MESSAGE_DURABILITY: {durability}")
+        self.path = path
+        self.durability = durability
+        self.interval = interval
+        self._pid = None
+
+    def _ensure_started(self):
+        # (Re)initialise lazily so each gunicorn worker gets its own thread and connection after fork
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+        self._pending = []          # (seq, row)
+        self._last_seq = 0          # last sequence number handed out
+        self._flushed_seq = 0       # every seq <= this has been committed (or failed)
+        self._conv_seq = {}         # conversation_id -> last seq queued for it
+        self._errors = {}           # seq -> exception, for "group" writers to re-raise
+        self._flush_now = False
+        self._closed = False
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        if self.durability != "sync":
+            self._thread = threading.Thread(target=self._run, name="message-writer", daemon=True)
+            self._thread.start()
+
+    def write(self, conversation_id, user_id, message, response):
+        """Stores one chat turn according to the configured durability."""
+        with _start_lock:
+            self._ensure_started()
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())  # same format as CURRENT_TIMESTAMP
+        row = (conversation_id, user_id, message, response, timestamp)
+
+        with self._cond:
+            if self.durability == "sync" or self._closed:
+                # After close() (shutdown) rows are committed directly so in-flight requests aren't lost
+                self._insert([row])
+                return
+            self._last_seq += 1
+            seq = self._last_seq
+            self._pending.append((seq, row))
+            self._conv_seq[conversation_id] = seq
+            self._cond.notify_all()
+            if self.durability == "group":
+                while self._flushed_seq < seq:
+                    self._cond.wait()
+                error = self._errors.pop(seq, None)
+                if error:
+                    raise error
+
+    def barrier(self, conversation_id=None):
+        """
+        Blocks until queued rows for the conversation (or all rows) are committed,
+        so a following read sees them. Returns at once when nothing is queued.
+        """
+        if self._pid != os.getpid() or self.durability == "sync":
+            return
+        with self._cond:
+            target = self._last_seq if conversation_id is None else self._conv_seq.get(conversation_id, 0)
+            if self._flushed_seq >= target:
+                return
+            self._flush_now = True
+            self._cond.notify_all()
+            while self._flushed_seq < target:
+                self._cond.wait()
+
+    def _insert(self, rows):
+        self._conn.executemany(
+            "INSERT INTO messages (conversation_id, user_id, message, response, timestamp) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+        self._conn.commit()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+            # Let a group of writes gather before committing, unless a reader is waiting
+            # or we are shutting down (close() must not wait out a long interval)
+            with self._cond:
+                self._cond.wait_for(lambda: self._flush_now or self._closed, timeout=self.interval)
+                batch = self._pending[:MAX_BATCH]
+                del self._pending[:MAX_BATCH]
+                self._flush_now = bool(self._pending)
+            # Commit outside the lock so new turns can keep queueing meanwhile
+            error = None
+            try:
+                self._insert([row for _, row in batch])
+            except Exception as e:
+                # Any failure, not just sqlite3.Error: the thread must survive and advance
+                # _flushed_seq below, or "group" writers and barrier() would wait forever
+                if self._conn.in_transaction:
+                    self._conn.rollback()
+                print(f"⚠️ Failed to write {len(batch)} messages: {e}")
+                error = e
+            with self._cond:
+                if error and self.durability == "group":
+                    for seq, _ in batch:
+                        self._errors[seq] = error
+                self._flushed_seq = batch[-1][0]
+                for conv_id, seq in list(self._conv_seq.items()):
+                    if seq <= self._flushed_seq:
+                        del self._conv_seq[conv_id]
+                self._cond.notify_all()
+
+    def close(self):
+        """
+        Flushes everything still queued and stops the writer thread; later writes
+        commit synchronously. Runs at interpreter exit and on SIGTERM.
+        """
+        if self._pid != os.getpid() or self._closed:
+            return
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self.durability != "sync":
+            self._thread.join(timeout=10)
+
+
+_start_lock = threading.Lock()
+message_writer = MessageWriter()
+atexit.register(message_writer.close)
+
+# supervisord (and docker stop) stop programs with SIGTERM, and atexit handlers
+# don't run on an unhandled SIGTERM, so queued messages are flushed here first.
+_previous_sigterm = None
+
+def _flush_on_sigterm(signum, frame):
+    message_writer.close()
+    if callable(_previous_sigterm):
+        _previous_sigterm(signum, frame)  # e.g. gunicorn's graceful worker shutdown
+    elif _previous_sigterm != signal.SIG_IGN:
+        sys.exit(128 + signum)
+
+def install_sigterm_handler():
+    global _previous_sigterm
+    if threading.current_thread() is threading.main_thread():  # signal handlers can only be set there
+        _previous_sigterm = signal.signal(signal.SIGTERM, _flush_on_sigterm)
+
+install_sigterm_handler()